@@ -0,0 +1,62 @@
+-- Query Plan Check
+-- Run after 009_sync_indexes.sql to assert the sync hot queries can use their indexes.
+-- Sequential scans are disabled for the check so tiny tables still show whether
+-- an index is usable; the block raises an exception on the first failure.
+
+DO $$
+DECLARE
+    t TEXT;
+    plan TEXT;
+    query TEXT;
+BEGIN
+    SET LOCAL enable_seqscan = off;
+
+    FOREACH t IN ARRAY ARRAY['work_orders', 'customers', 'technicians', 'appointments', 'service_appointments']
+    LOOP
+        IF to_regclass(format('zoho_fsm.%I', t)) IS NULL THEN
+            CONTINUE;
+        END IF;
+
+        -- Pending outbound scan, exactly as get_records builds it for reverse sync
+        query := format(
+            'SELECT * FROM zoho_fsm.%I WHERE sync_status = %L AND source = %L',
+            t, 'pending', 'supabase'
+        );
+        EXECUTE 'EXPLAIN (FORMAT JSON) ' || query INTO plan;
+        IF plan NOT LIKE '%idx_' || t || '_pending_outbound%' THEN
+            RAISE EXCEPTION 'Pending scan on zoho_fsm.% does not use idx_%_pending_outbound: %', t, t, plan;
+        END IF;
+        RAISE NOTICE 'OK: pending scan on zoho_fsm.% uses idx_%_pending_outbound', t, t;
+
+        -- Paginated reads (get_records_page) walk the primary key
+        query := format('SELECT * FROM zoho_fsm.%I WHERE id > (SELECT min(id) FROM zoho_fsm.%I) ORDER BY id LIMIT 100', t, t);
+        EXECUTE 'EXPLAIN (FORMAT JSON) ' || query INTO plan;
+        IF plan NOT LIKE '%Index%' THEN
+            RAISE EXCEPTION 'Keyset page on zoho_fsm.% does not use an index: %', t, plan;
+        END IF;
+        RAISE NOTICE 'OK: keyset page on zoho_fsm.% uses an index', t;
+
+        -- Incremental reads by modification time
+        IF to_regclass(format('zoho_fsm.%I', 'idx_' || t || '_modified_time_id')) IS NOT NULL THEN
+            query := format(
+                'SELECT * FROM zoho_fsm.%I WHERE modified_time > NOW() - INTERVAL %L ORDER BY modified_time, id LIMIT 100',
+                t, '1 day'
+            );
+            EXECUTE 'EXPLAIN (FORMAT JSON) ' || query INTO plan;
+            IF plan NOT LIKE '%idx_' || t || '_modified_time_id%' THEN
+                RAISE EXCEPTION 'Modified-time scan on zoho_fsm.% does not use idx_%_modified_time_id: %', t, t, plan;
+            END IF;
+            RAISE NOTICE 'OK: modified-time scan on zoho_fsm.% uses idx_%_modified_time_id', t, t;
+        END IF;
+    END LOOP;
+
+    -- Outbox claims only look at open entries
+    EXECUTE 'EXPLAIN (FORMAT JSON) SELECT record_id, version FROM sync_outbox
+             WHERE schema_name = ''zoho_fsm'' AND table_name = ''work_orders'' AND processed_at IS NULL'
+        INTO plan;
+    IF plan NOT LIKE '%idx_sync_outbox_unprocessed%' THEN
+        RAISE EXCEPTION 'Outbox claim does not use idx_sync_outbox_unprocessed: %', plan;
+    END IF;
+    RAISE NOTICE 'OK: outbox claim uses idx_sync_outbox_unprocessed';
+END;
+$$;
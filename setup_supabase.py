@@ -45,7 +45,22 @@ class SupabaseSetup:
         migration_files = sorted([
             "001_create_schemas.sql",
             "002_create_fsm_tables.sql", 
-            "002_functions.sql"
+            "002_functions.sql",
+            "003_bulk_upsert.sql",
+            "004_content_hash.sql",
+            "005_paginated_reads.sql",
+            "006_bulk_update.sql",
+            "007_sync_snapshot.sql",
+            "008_outbox.sql",
+            "009_sync_indexes.sql",
+            "010_sync_status_overview.sql",
+            "011_sync_checkpoints.sql",
+            "012_backfill_windows.sql",
+            "013_soft_delete.sql",
+            "014_bucket_digests.sql",
+            "015_zoho_id_keys.sql",
+            "016_snapshot_columns.sql",
+            "017_complete_outbox.sql"
         ])
         
         for migration_file in migration_files:
@@ -1,10 +1,19 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from loguru import logger
+import base64
+import csv
+import hmac
+import io
+import json
+import zlib
 from .sync_manager import SyncManager
+from .webhook_queue import WebhookQueue, WebhookConsumer
+from .outbox_listener import OutboxListener
 from .config import settings
 
 app = FastAPI(title="Zoho-Supabase Sync API", version="1.0.0")
@@ -20,10 +29,16 @@ app.add_middleware(
 
 # Initialize sync manager
 sync_manager = SyncManager()
+webhook_queue = WebhookQueue(settings.webhook_queue_path)
+webhook_consumer = WebhookConsumer(webhook_queue, sync_manager)
+outbox_listener = OutboxListener(sync_manager)
 
 class SyncRequest(BaseModel):
     force: bool = False
 
+class BackfillRequest(BaseModel):
+    tables: Optional[List[str]] = None
+
 class WebhookData(BaseModel):
     event_type: str
     data: Dict
@@ -33,6 +48,18 @@ class WebhookData(BaseModel):
 async def startup_event():
     """Initialize sync manager on startup"""
     await sync_manager.initialize()
+    await sync_manager.resume_backfill()
+    webhook_consumer.start()
+    outbox_listener.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background sync and close pooled connections on shutdown"""
+    await webhook_consumer.stop()
+    await outbox_listener.stop()
+    await sync_manager.stop_continuous_sync()
+    await sync_manager.close()
+    webhook_queue.close()
 
 @app.get("/health")
 async def health_check():
@@ -40,54 +67,133 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
 @app.post("/sync/trigger")
-async def trigger_sync(background_tasks: BackgroundTasks, request: SyncRequest):
-    """Trigger manual sync"""
+async def trigger_sync(request: SyncRequest):
+    """Trigger manual sync
+    
+    If a sync is already running, the request is folded into a single
+    follow-up run; poll /sync/runs/{run_id} for its outcome.
+    """
     try:
-        background_tasks.add_task(sync_manager.trigger_manual_sync)
-        return {"message": "Sync triggered successfully", "force": request.force}
+        run = await sync_manager.trigger_manual_sync()
+        return {
+            "message": "Sync triggered successfully",
+            "force": request.force,
+            "run_id": run.id,
+            "status": run.status
+        }
     except Exception as e:
         logger.error(f"Error triggering sync: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/sync/backfill")
+async def trigger_backfill(request: BackfillRequest):
+    """Trigger a full, checkpointed load of FSM data
+    
+    Entities with an unfinished backfill resume from their checkpoint;
+    progress is reported under "backfill" in /sync/status.
+    """
+    if request.tables is not None:
+        unknown = set(request.tables) - set(sync_manager.FSM_ENTITIES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown tables: {', '.join(sorted(unknown))}")
+    try:
+        run = await sync_manager.trigger_backfill(request.tables)
+        return {
+            "message": "Backfill triggered successfully",
+            "run_id": run.id,
+            "status": run.status
+        }
+    except Exception as e:
+        logger.error(f"Error triggering backfill: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/sync/reconcile")
+async def reconcile_deletions(background_tasks: BackgroundTasks):
+    """Soft-delete rows whose records were deleted in Zoho
+    
+    Runs in the background; it lists every Zoho ID, so use sparingly.
+    """
+    try:
+        background_tasks.add_task(sync_manager.reconcile_deletions)
+        return {"message": "Deletion reconciliation started"}
+    except Exception as e:
+        logger.error(f"Error starting deletion reconciliation: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/sync/verify")
+async def verify_integrity(background_tasks: BackgroundTasks):
+    """Compare bucketed checksums with Zoho and repair buckets that differ
+    
+    Runs in the background; it lists every Zoho ID, so use sparingly.
+    """
+    try:
+        background_tasks.add_task(sync_manager.verify_integrity)
+        return {"message": "Integrity check started"}
+    except Exception as e:
+        logger.error(f"Error starting integrity check: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/sync/runs/{run_id}")
+async def get_sync_run(run_id: str):
+    """Get the status of a sync run"""
+    run = sync_manager.coordinator.get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Sync run not found")
+    return run.to_dict()
+
+def _backfill_progress(checkpoint: Dict) -> Dict:
+    """Summarise a backfill checkpoint, counting windows instead of listing them"""
+    windows = checkpoint.get("windows") or []
+    progress = {key: value for key, value in checkpoint.items() if key != "windows"}
+    progress["windows"] = len(windows)
+    progress["windows_complete"] = sum(1 for window in windows if window.get("status") == "complete")
+    return progress
+
 @app.get("/sync/status")
 async def get_sync_status():
     """Get current sync status"""
     try:
+        all_status = await sync_manager.supabase_client.get_all_sync_status()
+        
         status = {}
         schemas = ["zoho_fsm", "zoho_crm", "zoho_inventory"]
-        
+        tables = ["work_orders", "customers", "technicians", "appointments"]
         for schema in schemas:
-            status[schema] = {}
-            tables = ["work_orders", "customers", "technicians", "appointments"]
-            
-            for table in tables:
-                try:
-                    table_status = await sync_manager.supabase_client.get_sync_status(schema, table)
-                    status[schema][table] = table_status
-                except:
-                    status[schema][table] = {"status": "unknown"}
+            status[schema] = {
+                table: all_status.get(f"{schema}.{table}") or {"status": "unknown"}
+                for table in tables
+            }
         
+        checkpoints = await sync_manager.supabase_client.get_sync_checkpoints()
+        status["backfill"] = {
+            name: _backfill_progress(checkpoint) for name, checkpoint in checkpoints.items()
+        }
         return status
     except Exception as e:
         logger.error(f"Error getting sync status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/webhook/zoho")
-async def zoho_webhook(data: WebhookData):
-    """Handle Zoho webhooks for real-time updates"""
+@app.post("/webhook/zoho", status_code=202)
+async def zoho_webhook(data: WebhookData,
+                       x_webhook_secret: Optional[str] = Header(None)):
+    """Queue a Zoho webhook for real-time updates
+    
+    Events are persisted and acknowledged immediately; a background consumer
+    debounces repeats for the same record and applies them in batches.
+    """
+    if not hmac.compare_digest(x_webhook_secret or "", settings.webhook_secret):
+        raise HTTPException(status_code=401, detail="Invalid webhook secret")
+    
     try:
         logger.info(f"Received Zoho webhook: {data.event_type}")
-        
-        # Process webhook based on event type
-        if data.event_type == "work_order_updated":
-            await sync_manager.sync_fsm_data()
-        elif data.event_type == "customer_updated":
-            await sync_manager.sync_fsm_data()
-        # Add more event types as needed
-        
-        return {"message": "Webhook processed successfully"}
+        event_id = await webhook_queue.append(
+            data.event_type,
+            sync_manager.webhook_key(data.event_type, data.data),
+            data.data
+        )
+        return {"message": "Webhook queued", "event_id": event_id}
     except Exception as e:
-        logger.error(f"Error processing webhook: {e}")
+        logger.error(f"Error queueing webhook: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/logs")
@@ -101,27 +207,51 @@ async def get_logs(limit: int = 100):
         logger.error(f"Error getting logs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _encode_cursor(last_id) -> str:
+    """Encode the last id of a page as an opaque cursor"""
+    payload = json.dumps({"id": last_id}).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+def _decode_cursor(cursor: str) -> str:
+    """Decode an opaque cursor back into the id to continue after"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @app.get("/data/{schema}/{table}")
-async def get_data(schema: str, table: str, limit: int = 100, offset: int = 0):
-    """Get data from specified schema.table"""
+async def get_data(schema: str, table: str,
+                   limit: int = Query(100, ge=1, le=settings.api_max_page_size),
+                   cursor: Optional[str] = None,
+                   offset: int = Query(0, ge=0)):
+    """Get a page of data from specified schema.table
+    
+    Follow `next_cursor` to page through the table; `offset` is kept for
+    older clients but is slower on large tables.
+    """
     try:
         # Validate schema and table
         valid_schemas = ["zoho_fsm", "zoho_crm", "zoho_inventory"]
         if schema not in valid_schemas:
             raise HTTPException(status_code=400, detail=f"Invalid schema: {schema}")
         
-        # Get data using sync manager's supabase client
-        data = await sync_manager.supabase_client.get_records(schema, table)
+        after = _decode_cursor(cursor) if cursor else None
         
-        # Apply pagination
-        if isinstance(data, list):
-            data = data[offset:offset + limit]
+        # Fetch one extra row to learn whether another page exists
+        data = await sync_manager.supabase_client.get_records_page(
+            schema, table, after=after, limit=limit + 1,
+            offset=0 if after else offset
+        )
+        has_more = len(data) > limit
+        data = data[:limit]
         
         return {
             "schema": schema,
             "table": table,
-            "count": len(data) if isinstance(data, list) else 0,
-            "data": data
+            "count": len(data),
+            "data": data,
+            "next_cursor": _encode_cursor(data[-1]["id"]) if has_more else None
         }
     except HTTPException:
         raise
@@ -129,6 +259,66 @@ async def get_data(schema: str, table: str, limit: int = 100, offset: int = 0):
         logger.error(f"Error getting data from {schema}.{table}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/export/{schema}/{table}")
+async def export_data(schema: str, table: str,
+                      format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+                      gzip: bool = False):
+    """Stream every row of specified schema.table as NDJSON or CSV
+    
+    Rows are read page by page with a keyset cursor and written out as they
+    arrive, so memory use doesn't grow with table size.
+    """
+    valid_schemas = ["zoho_fsm", "zoho_crm", "zoho_inventory"]
+    if schema not in valid_schemas:
+        raise HTTPException(status_code=400, detail=f"Invalid schema: {schema}")
+    
+    async def rows():
+        fieldnames = None
+        async for page in sync_manager.supabase_client.iter_record_pages(
+            schema, table, page_size=settings.export_page_size
+        ):
+            if format == "ndjson":
+                yield "".join(json.dumps(row, default=str) + "\n" for row in page)
+                continue
+            
+            buffer = io.StringIO()
+            writer = csv.DictWriter(
+                buffer, fieldnames=fieldnames or list(page[0].keys()), extrasaction="ignore"
+            )
+            if fieldnames is None:
+                fieldnames = writer.fieldnames
+                writer.writeheader()
+            for row in page:
+                writer.writerow({
+                    key: json.dumps(value) if isinstance(value, (dict, list)) else value
+                    for key, value in row.items()
+                })
+            yield buffer.getvalue()
+    
+    async def body():
+        try:
+            if not gzip:
+                async for chunk in rows():
+                    yield chunk.encode("utf-8")
+                return
+            
+            compressor = zlib.compressobj(wbits=31)  # gzip container
+            async for chunk in rows():
+                data = compressor.compress(chunk.encode("utf-8"))
+                if data:
+                    yield data
+            yield compressor.flush()
+        except Exception as e:
+            # Headers are already sent, so the best we can do is log and stop
+            logger.error(f"Error exporting {schema}.{table}: {e}")
+            raise
+    
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    headers = {"Content-Disposition": f'attachment; filename="{schema}.{table}.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
 @app.get("/data/{schema}/{table}/{record_id}")
 async def get_record(schema: str, table: str, record_id: str):
     """Get a specific record from schema.table"""
@@ -188,10 +378,15 @@ async def root():
         "endpoints": {
             "health": "/health",
             "sync_trigger": "/sync/trigger",
+            "sync_backfill": "/sync/backfill",
+            "sync_reconcile": "/sync/reconcile",
+            "sync_verify": "/sync/verify",
             "sync_status": "/sync/status",
+            "sync_run": "/sync/runs/{run_id}",
             "sync_start": "/sync/start",
             "sync_stop": "/sync/stop",
             "webhook": "/webhook/zoho",
+            "export": "/export/{schema}/{table}",
             "logs": "/logs"
         }
     } 
\ No newline at end of file
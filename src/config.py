@@ -9,17 +9,64 @@ class Settings(BaseSettings):
     zoho_refresh_token: str
     zoho_org_id: str
     zoho_base_url: str = "https://www.zohoapis.com"
+    zoho_accounts_url: str = "https://accounts.zoho.com"
+    zoho_token_cache_file: str = ".zoho_token.json"  # empty to disable
+    zoho_token_refresh_margin: int = 300  # refresh this many seconds before expiry
+    
+    # Zoho HTTP transport
+    zoho_max_connections: int = 20
+    zoho_max_keepalive_connections: int = 10
+    zoho_keepalive_expiry: float = 30.0
+    zoho_timeout: float = 30.0
+    zoho_http2: bool = False  # requires the httpx[http2] extra
+    zoho_page_size: int = 200  # Zoho FSM maximum per_page
+    zoho_bulk_write_size: int = 100  # Zoho maximum records per bulk create/update
+    
+    # Zoho API rate limiting
+    zoho_rate_limit_per_second: float = 2.0  # sustained request rate
+    zoho_rate_limit_burst: int = 10
+    zoho_daily_credit_limit: int = 10000
+    zoho_priority_credit_reserve: int = 500  # kept back for webhook-driven calls
     
     # Supabase Configuration
     supabase_url: str
     supabase_anon_key: str
     supabase_service_role_key: str
+    supabase_max_concurrency: int = 10  # concurrent in-flight DB requests
+    supabase_db_url: Optional[str] = None  # direct Postgres URL for LISTEN/NOTIFY
     
     # Sync Configuration
     sync_interval: int = 300  # 5 minutes
     webhook_secret: str
+    webhook_queue_path: str = "webhook_queue.db"
+    webhook_debounce_seconds: float = 5.0  # wait for a record to go quiet before syncing it
+    webhook_batch_size: int = 100
+    webhook_poll_interval: float = 1.0
+    webhook_retention_seconds: int = 86400  # keep processed events this long
     max_retries: int = 3
+    retry_base_delay: float = 0.5  # seconds, doubled per attempt with full jitter
+    retry_max_delay: float = 30.0
     batch_size: int = 100
+    sync_max_concurrency: int = 4  # entities synced in parallel
+    pipeline_queue_size: int = 4  # pages/batches buffered between pipeline stages
+    pipeline_transform_workers: int = 1
+    pipeline_writers: int = 2  # concurrent Supabase batch writers per entity
+    backfill_initial_windows: int = 8  # Modified_Time windows a backfill starts with
+    backfill_window_concurrency: int = 4  # windows loaded in parallel per entity
+    backfill_window_max_pages: int = 25  # pages read before a window's remainder is split
+    backfill_min_window_seconds: int = 60  # windows narrower than this are never split
+    outbox_poll_interval: float = 30.0  # used when supabase_db_url is not set
+    reconcile_interval: int = 86400  # deletion reconciliation, daily
+    reconcile_page_size: int = 5000  # zoho_ids per Supabase page / soft-delete RPC
+    reconcile_max_delete_fraction: float = 0.2  # refuse to delete more than this share of rows
+    reconcile_max_confirmations: int = 500  # per-record deletion checks per entity and run
+    verify_interval: int = 86400  # bucketed integrity check against Zoho, nightly
+    verify_bucket_seconds: int = 86400  # Modified_Time span of each checksum bucket
+    
+    # API
+    api_max_page_size: int = 1000
+    export_page_size: int = 1000
+    sync_status_cache_ttl: float = 2.0  # seconds
     
     # Logging
     log_level: str = "INFO"
@@ -0,0 +1,90 @@
+import asyncio
+from typing import Optional
+from loguru import logger
+from .config import settings
+
+class OutboxListener:
+    """Wakes reverse sync when rows are queued in the sync_outbox table
+
+    With settings.supabase_db_url set, a direct Postgres connection LISTENs on
+    the `sync_outbox` channel fed by the outbox trigger, so reverse sync runs
+    within seconds of an edit and not at all while idle. Without it, the
+    outbox is polled every settings.outbox_poll_interval seconds instead.
+    """
+
+    CHANNEL = "sync_outbox"
+
+    def __init__(self, sync_manager):
+        self.sync_manager = sync_manager
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._connection = None
+
+    def start(self) -> None:
+        """Start listening in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop listening and close the Postgres connection"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._disconnect()
+
+    def _notify(self, connection, pid, channel, payload) -> None:
+        self._wake.set()
+
+    async def _connect(self) -> None:
+        """Open the LISTEN connection if a direct database URL is configured"""
+        if not settings.supabase_db_url or self._connection is not None:
+            return
+        import asyncpg  # only needed for LISTEN/NOTIFY
+
+        self._connection = await asyncpg.connect(settings.supabase_db_url)
+        await self._connection.add_listener(self.CHANNEL, self._notify)
+        logger.info(f"Listening for outbound changes on {self.CHANNEL}")
+
+    async def _disconnect(self) -> None:
+        if self._connection is not None:
+            try:
+                await self._connection.close()
+            except Exception as e:
+                logger.warning(f"Error closing outbox listener connection: {e}")
+            self._connection = None
+
+    async def _run(self) -> None:
+        # Drain anything queued while we weren't listening
+        self._wake.set()
+        while True:
+            try:
+                await self._connect()
+            except Exception as e:
+                logger.error(f"Outbox listener could not connect, polling instead: {e}")
+
+            if self._connection is not None:
+                # Notifications drive the loop; the long timeout is just a safety net
+                timeout = settings.sync_interval
+            else:
+                timeout = settings.outbox_poll_interval
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            if self._connection is not None and self._connection.is_closed():
+                self._connection = None
+                continue
+
+            try:
+                await self.sync_manager.sync_from_supabase_to_zoho()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in outbox-driven reverse sync: {e}")
+                await asyncio.sleep(60)  # Wait 1 minute before retrying
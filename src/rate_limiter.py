@@ -0,0 +1,79 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from .config import settings
+
+class CreditBudgetExceeded(Exception):
+    """Raised when a request would exceed the daily Zoho API credit budget"""
+
+class RateLimiter:
+    """Async token-bucket limiter with a daily API credit budget
+
+    The bucket refills at `rate` tokens per second up to `burst`. The daily
+    budget is shared by every caller, but background callers stop at
+    `daily_limit - reserve` so priority (webhook) requests keep headroom.
+    """
+
+    def __init__(self, rate: float, burst: int, daily_limit: int, reserve: int = 0):
+        self.rate = rate
+        self.burst = burst
+        self.daily_limit = daily_limit
+        self.reserve = reserve
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._credits_used = 0
+        self._credits_day = datetime.now(timezone.utc).date()
+        self._lock = asyncio.Lock()
+
+    @property
+    def credits_used(self) -> int:
+        """Credits consumed so far today (UTC)"""
+        self._roll_day()
+        return self._credits_used
+
+    @property
+    def credits_remaining(self) -> int:
+        """Credits left in today's budget, including the priority reserve"""
+        return max(self.daily_limit - self.credits_used, 0)
+
+    def _roll_day(self) -> None:
+        """Reset the daily credit counter at UTC midnight"""
+        today = datetime.now(timezone.utc).date()
+        if today != self._credits_day:
+            self._credits_day = today
+            self._credits_used = 0
+
+    def _refill(self) -> None:
+        """Add tokens for the time elapsed since the last refill"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _reserve_credits(self, cost: int, priority: bool) -> None:
+        """Charge today's budget, honouring the priority reserve"""
+        self._roll_day()
+        limit = self.daily_limit if priority else self.daily_limit - self.reserve
+        if self._credits_used + cost > limit:
+            raise CreditBudgetExceeded(
+                f"Zoho daily credit budget exhausted ({self._credits_used}/{self.daily_limit} used)"
+            )
+        self._credits_used += cost
+
+    async def acquire(self, cost: int = 1, priority: bool = False) -> None:
+        """Wait for a request slot and charge `cost` credits to today's budget"""
+        async with self._lock:
+            self._reserve_credits(cost, priority)
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+zoho_rate_limiter = RateLimiter(
+    rate=settings.zoho_rate_limit_per_second,
+    burst=settings.zoho_rate_limit_burst,
+    daily_limit=settings.zoho_daily_credit_limit,
+    reserve=settings.zoho_priority_credit_reserve
+)
+
@@ -0,0 +1,75 @@
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+# Methods that can safely be replayed after an ambiguous failure
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Transient statuses worth retrying for idempotent requests
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Statuses where the server rejected the request without processing it,
+# so even non-idempotent requests (POST) can be retried
+REJECTED_STATUSES = frozenset({429, 503})
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, honouring Retry-After
+
+    Shared by the async ZohoClient and the synchronous ZohoFSMClient; callers
+    own the request loop and ask the policy whether and how long to wait.
+    """
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5,
+                 max_delay: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def retryable_status(self, method: str, status_code: int) -> bool:
+        """Whether a response status is worth retrying for this method"""
+        if method.upper() in IDEMPOTENT_METHODS:
+            return status_code in RETRYABLE_STATUSES
+        return status_code in REJECTED_STATUSES
+
+    def retryable_error(self, method: str, request_sent: bool) -> bool:
+        """Whether a network error is worth retrying for this method
+
+        Errors before the request reached the server (connect failures, pool
+        timeouts) are always safe; anything later is only safe to replay for
+        idempotent methods.
+        """
+        return not request_sent or method.upper() in IDEMPOTENT_METHODS
+
+    def retry_after_allowed(self, retry_after: Optional[str]) -> bool:
+        """Whether a server-requested wait is short enough to sleep through
+
+        Zoho answers a locked-out client with a Retry-After of hours; callers
+        should fail such requests rather than stall a whole sync run.
+        """
+        server_delay = self.parse_retry_after(retry_after)
+        return server_delay is None or server_delay <= self.max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Seconds to wait before retry number `attempt` (0-based), at most max_delay"""
+        server_delay = self.parse_retry_after(retry_after)
+        if server_delay is not None:
+            return min(server_delay, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header given as seconds or an HTTP date"""
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
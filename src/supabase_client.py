@@ -1,8 +1,11 @@
 from supabase import create_client, Client
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, AsyncIterator, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
 from .config import settings
+import asyncio
 import json
+import time
 
 class SupabaseClient:
     def __init__(self):
@@ -10,15 +13,36 @@ class SupabaseClient:
             settings.supabase_url,
             settings.supabase_service_role_key
         )
+        # supabase-py is synchronous; run queries on a bounded pool so they
+        # never block the event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.supabase_max_concurrency,
+            thread_name_prefix="supabase"
+        )
+        self._semaphore = asyncio.Semaphore(settings.supabase_max_concurrency)
+        # Short-lived cache of the overview RPCs behind /sync/status, keyed by
+        # function name; writes through this client clear the affected entry
+        self._overview_cache: Dict[str, Tuple[float, Dict[str, Dict]]] = {}
+        self._overview_lock = asyncio.Lock()
+    
+    async def _execute(self, query) -> Any:
+        """Execute a query builder off the event loop"""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, query.execute)
+    
+    def close(self) -> None:
+        """Shut down the query executor"""
+        self._executor.shutdown(wait=False)
     
     async def create_schema(self, schema_name: str) -> None:
         """Create schema for a Zoho app"""
         try:
             # Create schema using raw SQL
-            self.client.rpc(
+            await self._execute(self.client.rpc(
                 "create_schema_if_not_exists",
                 {"schema_name": schema_name}
-            ).execute()
+            ))
             logger.info(f"Schema {schema_name} created successfully")
         except Exception as e:
             logger.error(f"Error creating schema {schema_name}: {e}")
@@ -28,7 +52,7 @@ class SupabaseClient:
         """Upsert record in specified schema.table"""
         try:
             # Use RPC to call a function that handles schema.table operations
-            result = self.client.rpc(
+            result = await self._execute(self.client.rpc(
                 "upsert_record",
                 {
                     "p_schema": schema,
@@ -36,70 +60,344 @@ class SupabaseClient:
                     "p_data": json.dumps(data),
                     "p_unique_field": unique_field
                 }
-            ).execute()
+            ))
             
             return result.data
         except Exception as e:
             logger.error(f"Error upserting record in {schema}.{table}: {e}")
             raise
     
+    async def upsert_records(self, schema: str, table: str, rows: List[Dict],
+                             conflict_key: str = "id",
+                             batch_size: Optional[int] = None) -> int:
+        """Bulk upsert records in specified schema.table, one RPC per batch"""
+        batch_size = batch_size or settings.batch_size
+        
+        # A single INSERT ... ON CONFLICT cannot touch the same key twice,
+        # so keep only the latest version of each record
+        deduped = {}
+        for row in rows:
+            deduped[row.get(conflict_key, id(row))] = row
+        rows = list(deduped.values())
+        
+        written = 0
+        try:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                result = await self._execute(self.client.rpc(
+                    "upsert_records",
+                    {
+                        "p_schema": schema,
+                        "p_table": table,
+                        "p_rows": json.dumps(batch, default=str),
+                        "p_unique_field": conflict_key
+                    }
+                ))
+                written += result.data or 0
+            
+            return written
+        except Exception as e:
+            logger.error(f"Error bulk upserting records in {schema}.{table}: {e}")
+            raise
+    
+    async def update_records(self, schema: str, table: str, rows: List[Dict],
+                             key: str = "id",
+                             batch_size: Optional[int] = None) -> int:
+        """Bulk update existing records in specified schema.table, one RPC per batch"""
+        batch_size = batch_size or settings.batch_size
+        updated = 0
+        try:
+            for start in range(0, len(rows), batch_size):
+                result = await self._execute(self.client.rpc(
+                    "update_records",
+                    {
+                        "p_schema": schema,
+                        "p_table": table,
+                        "p_rows": json.dumps(rows[start:start + batch_size], default=str),
+                        "p_unique_field": key
+                    }
+                ))
+                updated += result.data or 0
+            
+            return updated
+        except Exception as e:
+            logger.error(f"Error bulk updating records in {schema}.{table}: {e}")
+            raise
+    
     async def get_records(self, schema: str, table: str, 
                          filters: Optional[Dict] = None) -> List[Dict]:
         """Get records from specified schema.table"""
         try:
             # Use RPC to call a function that handles schema.table operations
-            result = self.client.rpc(
+            result = await self._execute(self.client.rpc(
                 "get_records",
                 {
                     "p_schema": schema,
                     "p_table": table,
                     "p_filters": json.dumps(filters) if filters else None
                 }
-            ).execute()
+            ))
             
             return result.data
         except Exception as e:
             logger.error(f"Error getting records from {schema}.{table}: {e}")
             raise
     
+    async def get_records_page(self, schema: str, table: str,
+                               filters: Optional[Dict] = None,
+                               after: Optional[str] = None,
+                               limit: int = 100, offset: int = 0) -> List[Dict]:
+        """Get one page of records from specified schema.table, ordered by id
+        
+        Pass the last id of the previous page as `after` for keyset pagination.
+        """
+        try:
+            result = await self._execute(self.client.rpc(
+                "get_records_page",
+                {
+                    "p_schema": schema,
+                    "p_table": table,
+                    "p_filters": json.dumps(filters) if filters else None,
+                    "p_after": after,
+                    "p_limit": limit,
+                    "p_offset": offset
+                }
+            ))
+            
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Error getting records page from {schema}.{table}: {e}")
+            raise
+    
+    async def iter_record_pages(self, schema: str, table: str,
+                                filters: Optional[Dict] = None,
+                                page_size: Optional[int] = None) -> AsyncIterator[List[Dict]]:
+        """Yield every record of specified schema.table in id order, a page at a time"""
+        page_size = page_size or settings.batch_size
+        after = None
+        while True:
+            page = await self.get_records_page(
+                schema, table, filters, after=after, limit=page_size
+            )
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            after = str(page[-1]["id"])
+    
+    async def get_zoho_ids_page(self, schema: str, table: str,
+                                after: Optional[str] = None, limit: Optional[int] = None,
+                                before: Optional[str] = None) -> List[Dict]:
+        """Get one page of {"id", "zoho_id", "deleted"} from specified schema.table in id order
+        
+        Rows created at or after `before` are left out.
+        """
+        try:
+            result = await self._execute(self.client.rpc(
+                "get_zoho_ids_page",
+                {
+                    "p_schema": schema,
+                    "p_table": table,
+                    "p_after": after,
+                    "p_limit": limit or settings.reconcile_page_size,
+                    "p_before": before
+                }
+            ))
+            
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Error getting zoho_ids from {schema}.{table}: {e}")
+            raise
+    
+    async def iter_zoho_ids(self, schema: str, table: str,
+                            before: Optional[str] = None,
+                            page_size: Optional[int] = None) -> AsyncIterator[List[Dict]]:
+        """Yield the zoho_ids of specified schema.table in id order, a page at a time"""
+        page_size = page_size or settings.reconcile_page_size
+        after = None
+        while True:
+            page = await self.get_zoho_ids_page(
+                schema, table, after=after, limit=page_size, before=before
+            )
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            after = str(page[-1]["id"])
+    
+    async def get_content_hashes(self, schema: str, table: str) -> Dict[str, str]:
+        """Get the zoho_id -> content_hash index for specified schema.table"""
+        try:
+            result = await self._execute(self.client.rpc(
+                "get_content_hashes",
+                {
+                    "p_schema": schema,
+                    "p_table": table
+                }
+            ))
+            
+            return result.data or {}
+        except Exception as e:
+            logger.error(f"Error getting content hashes from {schema}.{table}: {e}")
+            raise
+    
+    async def claim_outbox(self, schema: str, table: str, limit: int = 100) -> Dict:
+        """Claim rows queued for Zoho in the outbox for specified schema.table
+        
+        Returns {"rows": [...], "versions": {record_id: version}}.
+        """
+        try:
+            result = await self._execute(self.client.rpc(
+                "claim_outbox",
+                {
+                    "p_schema": schema,
+                    "p_table": table,
+                    "p_limit": limit
+                }
+            ))
+            
+            return result.data or {"rows": [], "versions": {}}
+        except Exception as e:
+            logger.error(f"Error claiming outbox for {schema}.{table}: {e}")
+            raise
+    
+    async def complete_outbox(self, schema: str, table: str, rows: List[Dict],
+                              versions: Dict[str, int]) -> int:
+        """Write push results for claimed outbox rows and close their entries
+        
+        Rows edited again since the claim are left pending. Returns the number
+        of rows marked synced.
+        """
+        try:
+            result = await self._execute(self.client.rpc(
+                "complete_outbox",
+                {
+                    "p_schema": schema,
+                    "p_table": table,
+                    "p_rows": json.dumps(rows, default=str),
+                    "p_versions": json.dumps(versions)
+                }
+            ))
+            
+            return result.data or 0
+        except Exception as e:
+            logger.error(f"Error completing outbox for {schema}.{table}: {e}")
+            raise
+    
     async def delete_record(self, schema: str, table: str, record_id: str) -> bool:
         """Delete record from specified schema.table"""
         try:
-            result = self.client.rpc(
+            result = await self._execute(self.client.rpc(
                 "delete_record",
                 {
                     "p_schema": schema,
                     "p_table": table,
                     "p_record_id": record_id
                 }
-            ).execute()
+            ))
             
             return result.data
         except Exception as e:
             logger.error(f"Error deleting record from {schema}.{table}: {e}")
             raise
     
+    async def get_bucket_digests(self, schema: str, table: str, bucket_seconds: int,
+                                 before_epoch: int) -> Dict[str, Dict]:
+        """Get {"count", "digest"} per Modified_Time bucket of specified schema.table"""
+        try:
+            result = await self._execute(self.client.rpc(
+                "get_bucket_digests",
+                {
+                    "p_schema": schema,
+                    "p_table": table,
+                    "p_bucket_seconds": bucket_seconds,
+                    "p_before_epoch": before_epoch
+                }
+            ))
+            
+            return result.data or {}
+        except Exception as e:
+            logger.error(f"Error getting bucket digests from {schema}.{table}: {e}")
+            raise
+    
+    async def set_records_deleted(self, schema: str, table: str, zoho_ids: List[str],
+                                  deleted: bool = True,
+                                  batch_size: Optional[int] = None) -> List[str]:
+        """Soft-delete (or restore) records in specified schema.table by zoho_id
+        
+        Returns the zoho_ids of the rows that changed.
+        """
+        batch_size = batch_size or settings.reconcile_page_size
+        changed = []
+        try:
+            for start in range(0, len(zoho_ids), batch_size):
+                result = await self._execute(self.client.rpc(
+                    "set_records_deleted",
+                    {
+                        "p_schema": schema,
+                        "p_table": table,
+                        "p_zoho_ids": json.dumps(zoho_ids[start:start + batch_size]),
+                        "p_deleted": deleted
+                    }
+                ))
+                changed.extend(result.data or [])
+            
+            return changed
+        except Exception as e:
+            action = "soft-deleting" if deleted else "restoring"
+            logger.error(f"Error {action} records in {schema}.{table}: {e}")
+            raise
+    
     async def get_sync_status(self, schema: str, table: str) -> Dict:
         """Get sync status for a table"""
         try:
-            result = self.client.rpc(
+            result = await self._execute(self.client.rpc(
                 "get_sync_status",
                 {
                     "p_schema": schema,
                     "p_table": table
                 }
-            ).execute()
+            ))
             
             return result.data
         except Exception as e:
             logger.error(f"Error getting sync status for {schema}.{table}: {e}")
             raise
     
+    async def _get_overview(self, function: str) -> Dict[str, Dict]:
+        """Call an argument-less overview RPC, caching the result for settings.sync_status_cache_ttl seconds"""
+        cached = self._overview_cache.get(function)
+        if cached is not None and time.monotonic() < cached[0]:
+            return cached[1]
+        
+        async with self._overview_lock:
+            # Another caller may have refreshed the cache while we waited
+            cached = self._overview_cache.get(function)
+            if cached is not None and time.monotonic() < cached[0]:
+                return cached[1]
+            result = await self._execute(self.client.rpc(function, {}))
+            data = result.data or {}
+            self._overview_cache[function] = (time.monotonic() + settings.sync_status_cache_ttl, data)
+            return data
+    
+    async def get_all_sync_status(self) -> Dict[str, Dict]:
+        """Get every sync status row keyed by "schema.table", in one round trip
+        
+        Results are cached for settings.sync_status_cache_ttl seconds.
+        """
+        try:
+            return await self._get_overview("get_all_sync_status")
+        except Exception as e:
+            logger.error(f"Error getting sync status overview: {e}")
+            raise
+    
     async def update_sync_status(self, schema: str, table: str, 
-                                last_sync: str, status: str) -> None:
+                                last_sync: Optional[str], status: str) -> None:
         """Update sync status for a table"""
         try:
-            self.client.rpc(
+            await self._execute(self.client.rpc(
                 "update_sync_status",
                 {
                     "p_schema": schema,
@@ -107,7 +405,44 @@ class SupabaseClient:
                     "p_last_sync": last_sync,
                     "p_status": status
                 }
-            ).execute()
+            ))
+            self._overview_cache.pop("get_all_sync_status", None)
         except Exception as e:
             logger.error(f"Error updating sync status for {schema}.{table}: {e}")
-            raise 
\ No newline at end of file
+            raise
+    
+    async def get_sync_checkpoints(self) -> Dict[str, Dict]:
+        """Get every backfill checkpoint keyed by "schema.table"
+        
+        Results are cached like get_all_sync_status.
+        """
+        try:
+            return await self._get_overview("get_sync_checkpoints")
+        except Exception as e:
+            logger.error(f"Error getting sync checkpoints: {e}")
+            raise
+    
+    async def save_sync_checkpoint(self, schema: str, table: str, status: str,
+                                   windows: List[Dict], records_written: int,
+                                   started_at: Optional[str] = None) -> None:
+        """Save the backfill checkpoint for a table
+        
+        `started_at` is only passed when a new backfill starts; otherwise the
+        stored value is kept.
+        """
+        try:
+            await self._execute(self.client.rpc(
+                "save_sync_checkpoint",
+                {
+                    "p_schema": schema,
+                    "p_table": table,
+                    "p_status": status,
+                    "p_windows": json.dumps(windows),
+                    "p_records_written": records_written,
+                    "p_started_at": started_at
+                }
+            ))
+            self._overview_cache.pop("get_sync_checkpoints", None)
+        except Exception as e:
+            logger.error(f"Error saving sync checkpoint for {schema}.{table}: {e}")
+            raise
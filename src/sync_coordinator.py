@@ -0,0 +1,159 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+from loguru import logger
+
+# Kinds of run. A cycle covers any FSM sync; a backfill covers FSM syncs of its
+# own tables but not the rest of a cycle, so neither absorbs work it won't do.
+RUN_KINDS = ("fsm", "cycle", "backfill")
+
+def _tables_cover(tables: Optional[Set[str]], other: Optional[Set[str]]) -> bool:
+    """Whether a table scope (None meaning all) includes another"""
+    return tables is None or (other is not None and other <= tables)
+
+def _covers(kind: str, tables: Optional[Set[str]], other_kind: str, other_tables: Optional[Set[str]]) -> bool:
+    """Whether a run of `kind` over `tables` does everything the other run would"""
+    if kind == "cycle":
+        return other_kind in ("fsm", "cycle")
+    if kind == other_kind or (kind == "backfill" and other_kind == "fsm"):
+        return _tables_cover(tables, other_tables)
+    return False
+
+@dataclass
+class SyncRun:
+    id: str
+    kind: str
+    tables: Optional[Set[str]] = None  # FSM entities to sync or backfill; None means all
+    status: str = "queued"  # queued, running, success, error
+    requests: int = 1
+    requested_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Any = None
+    error: Optional[str] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def to_dict(self) -> Dict:
+        """Serialisable view of the run for the API"""
+        return {
+            "run_id": self.id,
+            "kind": self.kind,
+            "tables": sorted(self.tables) if self.tables is not None else None,
+            "status": self.status,
+            "requests": self.requests,
+            "requested_at": self.requested_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "result": self.result,
+            "error": self.error
+        }
+
+class SyncCoordinator:
+    """Single-flight runner for sync requests
+
+    At most one sync runs at a time. Requests that arrive while a run is in
+    progress are coalesced into follow-up runs, at most one per kind, so a
+    burst of triggers or webhooks costs at most one extra sync of each kind.
+    """
+
+    def __init__(self, sync_manager, history_size: int = 50):
+        self.sync_manager = sync_manager
+        self.history_size = history_size
+        self.runs: "OrderedDict[str, SyncRun]" = OrderedDict()
+        self.current: Optional[SyncRun] = None
+        self.pending: List[SyncRun] = []  # queued behind the current run, in order
+        self._task: Optional[asyncio.Task] = None
+
+    def request(self, kind: str = "cycle", tables: Optional[Iterable[str]] = None) -> SyncRun:
+        """Request a sync, returning the run that will satisfy it
+
+        `tables` limits an "fsm" or "backfill" run to some entities; cycles
+        always sync all.
+        """
+        if kind not in RUN_KINDS:
+            raise ValueError(f"Unknown sync kind: {kind}")
+        tables = set(tables) if tables is not None and kind in ("fsm", "backfill") else None
+
+        pending = self._attach(kind, tables)
+        if pending is not None:
+            pending.requests += 1
+            return pending
+
+        run = SyncRun(id=uuid.uuid4().hex, kind=kind, tables=tables)
+        self._remember(run)
+        if self.current is None:
+            self._start(run)
+        else:
+            # The current run may have already read past this change; rerun once after it
+            self.pending.append(run)
+            logger.info(f"Sync {self.current.id} in progress, queued rerun {run.id}")
+        return run
+
+    def _attach(self, kind: str, tables: Optional[Set[str]]) -> Optional[SyncRun]:
+        """Fold a request into a queued run, widening it if needed; None if none fits
+
+        A queued run is only ever widened to a scope that still covers
+        everything it was queued for, so no requested work is dropped.
+        """
+        for pending in self.pending:
+            if _covers(pending.kind, pending.tables, kind, tables):
+                return pending
+        for pending in self.pending:
+            if pending.kind == kind:
+                pending.tables = pending.tables | tables if None not in (pending.tables, tables) else None
+                return pending
+        for pending in self.pending:
+            if _covers(kind, tables, pending.kind, pending.tables):
+                pending.kind, pending.tables = kind, tables
+                return pending
+        return None
+
+    def get_run(self, run_id: str) -> Optional[SyncRun]:
+        """Look up a recent run by id"""
+        return self.runs.get(run_id)
+
+    async def wait(self, run: SyncRun) -> SyncRun:
+        """Wait for a run to finish"""
+        await run.done.wait()
+        return run
+
+    def _remember(self, run: SyncRun) -> None:
+        """Track a run, dropping the oldest finished ones beyond history_size"""
+        self.runs[run.id] = run
+        while len(self.runs) > self.history_size:
+            oldest_id, oldest = next(iter(self.runs.items()))
+            if not oldest.done.is_set():
+                break
+            del self.runs[oldest_id]
+
+    def _start(self, run: SyncRun) -> None:
+        """Launch a run in the background"""
+        self.current = run
+        self._task = asyncio.create_task(self._execute(run))
+
+    async def _execute(self, run: SyncRun) -> None:
+        """Run the sync and chain any rerun queued meanwhile"""
+        run.status = "running"
+        run.started_at = datetime.now()
+        logger.info(f"Starting {run.kind} sync run {run.id} ({run.requests} request(s))")
+        try:
+            if run.kind == "cycle":
+                run.result = await self.sync_manager.run_sync_cycle()
+            elif run.kind == "backfill":
+                run.result = await self.sync_manager.backfill_fsm_data(run.tables)
+            else:
+                run.result = await self.sync_manager.sync_fsm_data(run.tables)
+            run.status = "success"
+        except Exception as e:
+            logger.error(f"Sync run {run.id} failed: {e}")
+            run.status = "error"
+            run.error = str(e)
+        finally:
+            run.finished_at = datetime.now()
+            run.done.set()
+            self.current = None
+            if self.pending:
+                self._start(self.pending.pop(0))
@@ -1,17 +1,40 @@
 import asyncio
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+import hashlib
+import json
+import math
+import random
+from array import array
+from bisect import bisect_left
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 from loguru import logger
 from .zoho_client import ZohoClient
 from .supabase_client import SupabaseClient
+from .rate_limiter import zoho_rate_limiter
+from .sync_coordinator import SyncCoordinator, SyncRun
 from .config import settings
 
 class SyncManager:
+    FSM_ENTITIES = ("work_orders", "customers", "technicians", "appointments")
+    REVERSE_SYNC_ENTITIES = ("work_orders", "customers", "technicians")
+    # Columns that only exist on our side and must never be sent to Zoho
+    LOCAL_FIELDS = frozenset({
+        "id", "zoho_id", "source", "sync_status", "error_message", "content_hash",
+        "synced_snapshot", "created_at", "updated_at", "last_synced", "raw_data", "deleted_at"
+    })
+    # Zoho system fields: synced in, but read-only on Zoho's side
+    ZOHO_READ_ONLY_FIELDS = frozenset({"created_time", "modified_time", "created_by", "modified_by"})
+    
     def __init__(self):
         self.zoho_client = ZohoClient()
         self.supabase_client = SupabaseClient()
         self.sync_status = {}
+        # table -> {zoho_id: content hash} of what's already in Supabase
+        self.content_hashes: Dict[str, Dict[str, str]] = {}
         self.is_running = False
+        self.coordinator = SyncCoordinator(self)
+        self._reverse_sync_lock = asyncio.Lock()
+        self._reconcile_lock = asyncio.Lock()
         
     async def initialize(self):
         """Initialize sync manager and create schemas"""
@@ -31,208 +54,929 @@ class SyncManager:
         
         logger.info("Sync manager initialized successfully")
     
-    async def sync_fsm_data(self):
-        """Sync Zoho FSM data to Supabase"""
+    async def close(self):
+        """Release pooled connections held by the clients"""
+        await self.zoho_client.close()
+        self.supabase_client.close()
+        logger.info("Sync manager connections closed")
+    
+    async def sync_fsm_data(self, tables: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """Sync Zoho FSM data to Supabase, optionally only for some entities"""
         logger.info("Starting FSM data sync...")
+        results = await self._run_fsm_entities(tables, self._sync_fsm_entity, "FSM sync completed")
+        self.sync_status.setdefault("zoho_fsm", {}).update(results)
+        return results
+    
+    async def backfill_fsm_data(self, tables: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """Run a full, checkpointed load of Zoho FSM data into Supabase
         
+        Entities with an unfinished backfill resume from their checkpoint;
+        the rest start again from the beginning of their history.
+        """
+        logger.info("Starting FSM backfill...")
+        checkpoints = await self._backfill_checkpoints()
+        
+        async def backfill(table: str) -> int:
+            return await self._backfill_fsm_entity(table, checkpoints.get(table))
+        
+        results = await self._run_fsm_entities(tables, backfill, "FSM backfill completed")
+        self.sync_status.setdefault("zoho_fsm", {}).update(results)
+        return results
+    
+    async def resume_backfill(self) -> Optional[SyncRun]:
+        """Queue a backfill for entities whose last backfill never finished"""
         try:
-            # Get last sync time
-            sync_status = await self.supabase_client.get_sync_status("zoho_fsm", "work_orders")
-            last_sync = sync_status.get("last_sync") if sync_status else None
-            
-            # Sync work orders
-            work_orders = await self.zoho_client.get_work_orders(
-                modified_since=datetime.fromisoformat(last_sync) if last_sync else None
+            checkpoints = await self._backfill_checkpoints()
+        except Exception as e:
+            logger.error(f"Could not check for unfinished backfills: {e}")
+            return None
+        
+        tables = [
+            table for table, checkpoint in checkpoints.items()
+            if checkpoint.get("status") == "running"
+        ]
+        if not tables:
+            return None
+        logger.info(f"Resuming unfinished backfill for {', '.join(sorted(tables))}")
+        return self.coordinator.request("backfill", tables=tables)
+    
+    async def _backfill_checkpoints(self) -> Dict[str, Dict]:
+        """Backfill checkpoints for FSM entities, keyed by table"""
+        checkpoints = await self.supabase_client.get_sync_checkpoints()
+        return {
+            key.split(".", 1)[1]: checkpoint for key, checkpoint in checkpoints.items()
+            if key.startswith("zoho_fsm.")
+        }
+    
+    async def reconcile_deletions(self, tables: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """Soft-delete Supabase rows whose records have been deleted in Zoho
+        
+        Lists every Zoho ID, so it runs every settings.reconcile_interval
+        seconds rather than with each delta sync.
+        """
+        logger.info("Starting deletion reconciliation...")
+        async with self._reconcile_lock:
+            return await self._run_fsm_entities(
+                tables, self._reconcile_fsm_entity, "Deletion reconciliation completed, soft-deleted"
             )
-            
-            for work_order in work_orders:
-                # Add metadata for tracking
-                work_order["source"] = "zoho"
-                work_order["sync_status"] = "synced"
-                work_order["updated_at"] = datetime.now().isoformat()
-                
-                await self.supabase_client.upsert_record(
-                    "zoho_fsm", "work_orders", work_order, "id"
-                )
-            
-            # Sync customers
-            customers = await self.zoho_client.get_customers(
-                modified_since=datetime.fromisoformat(last_sync) if last_sync else None
+    
+    async def verify_integrity(self, tables: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """Compare bucketed checksums with Zoho and repair buckets that differ
+        
+        Runs every settings.verify_interval seconds rather than with each
+        delta sync.
+        """
+        logger.info("Starting integrity check...")
+        async with self._reconcile_lock:
+            return await self._run_fsm_entities(
+                tables, self._verify_fsm_entity, "Integrity check completed, rows repaired"
             )
-            
-            for customer in customers:
-                customer["source"] = "zoho"
-                customer["sync_status"] = "synced"
-                customer["updated_at"] = datetime.now().isoformat()
-                
-                await self.supabase_client.upsert_record(
-                    "zoho_fsm", "customers", customer, "id"
-                )
-            
-            # Sync technicians
-            technicians = await self.zoho_client.get_technicians(
-                modified_since=datetime.fromisoformat(last_sync) if last_sync else None
+    
+    async def _run_fsm_entities(self, tables: Optional[Iterable[str]], sync_entity,
+                                description: str) -> Dict[str, Dict]:
+        """Run `sync_entity(table)` for the FSM entities, or only `tables`
+        
+        Collects per-entity results and logs them after `description`.
+        """
+        wanted = None if tables is None else set(tables)
+        tables = [table for table in self.FSM_ENTITIES if wanted is None or table in wanted]
+        # Each entity runs as its own task so a slow or failing one
+        # doesn't hold up the others
+        semaphore = asyncio.Semaphore(settings.sync_max_concurrency)
+        
+        async def run(table: str) -> int:
+            async with semaphore:
+                return await sync_entity(table)
+        
+        outcomes = await asyncio.gather(
+            *(run(table) for table in tables), return_exceptions=True
+        )
+        
+        results = {}
+        for table, outcome in zip(tables, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error syncing FSM {table}: {outcome}")
+                results[table] = {"status": "error", "error": str(outcome)}
+            else:
+                results[table] = {"status": "success", "records": outcome}
+        
+        summary = ", ".join(
+            f"{result['records']} {table}" if result["status"] == "success"
+            else f"{table} failed"
+            for table, result in results.items()
+        )
+        logger.info(f"{description}: {summary}")
+        return results
+    
+    @staticmethod
+    def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+        """Parse an ISO timestamp from Zoho or Supabase, ignoring bad values"""
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+    
+    @staticmethod
+    def _content_hash(record: Dict) -> str:
+        """Stable hash of a record's Zoho payload, ignoring sync metadata"""
+        payload = {
+            key: value for key, value in record.items()
+            if key not in ("source", "sync_status", "updated_at", "content_hash", "synced_snapshot")
+        }
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    
+    async def _write_fsm_batch(self, table: str, batch: List[Dict]) -> int:
+        """Upsert a batch into zoho_fsm.<table> by zoho_id and record the written hashes"""
+        await self.supabase_client.upsert_records("zoho_fsm", table, batch, "zoho_id")
+        hashes = self.content_hashes[table]
+        for record in batch:
+            hashes[record["zoho_id"]] = record["content_hash"]
+        return len(batch)
+    
+    async def _load_content_hashes(self, table: str) -> Dict[str, str]:
+        """Get the hash index for an entity, loading it from Supabase on first use"""
+        if table not in self.content_hashes:
+            self.content_hashes[table] = await self.supabase_client.get_content_hashes(
+                "zoho_fsm", table
             )
-            
-            for technician in technicians:
-                technician["source"] = "zoho"
-                technician["sync_status"] = "synced"
-                technician["updated_at"] = datetime.now().isoformat()
+        return self.content_hashes[table]
+    
+    @staticmethod
+    def _to_columns(record: Dict) -> Dict:
+        """Map a Zoho record onto table columns, which are its field API names lowercased"""
+        return {key.lower(): value for key, value in record.items()}
+    
+    def _prepare_fsm_record(self, table: str, record: Dict, force: bool = False) -> Optional[Dict]:
+        """Turn a Zoho record into a row to write, or return None if it hasn't changed (unless forced)"""
+        content_hash = self._content_hash(record)
+        zoho_id = str(record.get("zoho_id") or record.get("id"))
+        if not force and self.content_hashes[table].get(zoho_id) == content_hash:
+            return None
+        
+        # Zoho's id goes in zoho_id; the local id is our own serial key, and
+        # rows created in Supabase already have one that differs from it
+        row = self._to_columns(record)
+        row.pop("id", None)
+        row["zoho_id"] = zoho_id
+        row["raw_data"] = record
+        # Snapshot in column form, the same shape _push_to_zoho stores and diffs against
+        row["synced_snapshot"] = self._zoho_fields(row)
+        row["source"] = "zoho"
+        row["sync_status"] = "synced"
+        row["content_hash"] = content_hash
+        row["deleted_at"] = None  # present in Zoho, so not (or no longer) deleted
+        return row
+    
+    @staticmethod
+    async def _run_stages(*stages) -> None:
+        """Run pipeline stages together, cancelling the rest if one fails"""
+        tasks = [asyncio.create_task(stage) for stage in stages]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+    
+    async def _run_fsm_pipeline(self, table: str,
+                                pages: AsyncIterator[Tuple[int, List[Dict]]],
+                                high_water: Optional[datetime] = None,
+                                on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+                                force: bool = False) -> Dict:
+        """Write Zoho pages into zoho_fsm.<table>, returning rows written and the high water mark
+        
+        Runs as a pipeline: a page fetcher, transform workers and batch writers
+        connected by bounded queues, so fetching and writing overlap and a slow
+        writer throttles fetching instead of letting pages pile up in memory.
+        `on_progress(next_page, written)` is awaited whenever every page before
+        `next_page` has been fully written. With `force`, records are written
+        even if their content hash is unchanged.
+        """
+        page_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.pipeline_queue_size)
+        batches: asyncio.Queue = asyncio.Queue(maxsize=settings.pipeline_queue_size)
+        transformers = max(settings.pipeline_transform_workers, 1)
+        writers = max(settings.pipeline_writers, 1)
+        state = {"high_water": high_water, "written": 0, "transformers": transformers, "next_page": None}
+        # Batches still to write per page, and pages written ahead of next_page
+        outstanding: Dict[int, int] = {}
+        finished = set()
+        progress_lock = asyncio.Lock()
+        
+        async def page_written(page_number: int):
+            if on_progress is None:
+                return
+            finished.add(page_number)
+            async with progress_lock:
+                advanced = False
+                while state["next_page"] in finished:
+                    finished.discard(state["next_page"])
+                    state["next_page"] += 1
+                    advanced = True
+                if advanced:
+                    await on_progress(state["next_page"], state["written"])
+        
+        async def fetch():
+            async for page_number, page in pages:
+                if state["next_page"] is None:
+                    state["next_page"] = page_number
+                await page_queue.put((page_number, page))
+            for _ in range(transformers):
+                await page_queue.put(None)
+        
+        async def transform():
+            while (item := await page_queue.get()) is not None:
+                page_number, page = item
+                batch = []
+                for record in page:
+                    modified_time = self._parse_timestamp(record.get("Modified_Time"))
+                    if modified_time and (state["high_water"] is None or modified_time > state["high_water"]):
+                        state["high_water"] = modified_time
+                    
+                    # Skip records whose payload hasn't changed since the last write
+                    record = self._prepare_fsm_record(table, record, force)
+                    if record is not None:
+                        batch.append(record)
                 
-                await self.supabase_client.upsert_record(
-                    "zoho_fsm", "technicians", technician, "id"
-                )
+                chunks = [
+                    batch[start:start + settings.batch_size]
+                    for start in range(0, len(batch), settings.batch_size)
+                ]
+                outstanding[page_number] = len(chunks)
+                if not chunks:
+                    await page_written(page_number)
+                for chunk in chunks:
+                    await batches.put((page_number, chunk))
             
-            # Sync appointments
-            appointments = await self.zoho_client.get_appointments(
-                modified_since=datetime.fromisoformat(last_sync) if last_sync else None
+            # The last transformer to finish tells the writers to stop
+            state["transformers"] -= 1
+            if state["transformers"] == 0:
+                for _ in range(writers):
+                    await batches.put(None)
+        
+        async def write():
+            while (item := await batches.get()) is not None:
+                page_number, batch = item
+                written = await self._write_fsm_batch(table, batch)
+                state["written"] += written
+                outstanding[page_number] -= 1
+                if outstanding[page_number] == 0:
+                    del outstanding[page_number]
+                    await page_written(page_number)
+        
+        await self._run_stages(
+            fetch(),
+            *(transform() for _ in range(transformers)),
+            *(write() for _ in range(writers))
+        )
+        return {
+            "written": state["written"],
+            "high_water": state["high_water"],
+            "next_page": state["next_page"]
+        }
+    
+    async def _sync_fsm_entity(self, table: str) -> int:
+        """Incrementally sync one FSM entity into zoho_fsm.<table>, returning rows written
+        
+        The entity's watermark is the highest Modified_Time seen, and is only
+        advanced once every write has succeeded.
+        """
+        sync_status = await self.supabase_client.get_sync_status("zoho_fsm", table)
+        last_sync = sync_status.get("last_sync") if sync_status else None
+        watermark = self._parse_timestamp(last_sync)
+        
+        await self._load_content_hashes(table)
+        
+        try:
+            result = await self._run_fsm_pipeline(
+                table,
+                self.zoho_client.iter_pages(self.zoho_client.ENTITY_ENDPOINTS[table], watermark),
+                watermark
             )
-            
-            for appointment in appointments:
-                appointment["source"] = "zoho"
-                appointment["sync_status"] = "synced"
-                appointment["updated_at"] = datetime.now().isoformat()
-                
-                await self.supabase_client.upsert_record(
-                    "zoho_fsm", "appointments", appointment, "id"
+        except Exception:
+            # Keep the previous watermark so the next run re-pulls this delta
+            try:
+                await self.supabase_client.update_sync_status(
+                    "zoho_fsm", table, last_sync, "error"
                 )
-            
-            # Update sync status
-            await self.supabase_client.update_sync_status(
-                "zoho_fsm", "work_orders", 
-                datetime.now().isoformat(), "success"
-            )
-            
-            logger.info(f"FSM sync completed: {len(work_orders)} work orders, "
-                       f"{len(customers)} customers, {len(technicians)} technicians, "
-                       f"{len(appointments)} appointments")
-            
-        except Exception as e:
-            logger.error(f"Error during FSM sync: {e}")
-            await self.supabase_client.update_sync_status(
-                "zoho_fsm", "work_orders", 
-                datetime.now().isoformat(), "error"
-            )
+            except Exception:
+                pass  # already logged; surface the original failure
             raise
+        
+        high_water = result["high_water"]
+        await self.supabase_client.update_sync_status(
+            "zoho_fsm", table,
+            high_water.isoformat() if high_water else None, "success"
+        )
+        return result["written"]
     
-    async def sync_from_supabase_to_zoho(self):
-        """Sync changes from Supabase back to Zoho"""
-        logger.info("Starting Supabase to Zoho sync...")
+    @classmethod
+    def _utc_timestamp(cls, value) -> Optional[datetime]:
+        """Parse a timestamp as an aware UTC datetime; naive values are taken as UTC"""
+        parsed = value if isinstance(value, datetime) else cls._parse_timestamp(value)
+        if parsed is None:
+            return None
+        if parsed.tzinfo is None:
+            return parsed.replace(tzinfo=timezone.utc)
+        return parsed.astimezone(timezone.utc)
+    
+    @staticmethod
+    def _backfill_window(start: datetime, end: datetime) -> Dict:
+        """A pending backfill window covering Modified_Time in [start, end)
         
+        `cursor` is the Modified_Time up to which the window is fully written.
+        """
+        return {"start": start.isoformat(), "end": end.isoformat(), "status": "pending", "cursor": None}
+    
+    async def _backfill_windows(self, table: str, started_at: datetime) -> List[Dict]:
+        """Split an entity's history up to `started_at` into equal Modified_Time windows"""
+        oldest = await self.zoho_client.get_oldest_record(table)
+        if oldest is None:
+            return []
+        start = self._utc_timestamp(oldest.get("Modified_Time"))
+        count = max(settings.backfill_initial_windows, 1)
+        if start is None or start >= started_at:
+            return [self._backfill_window(datetime(1970, 1, 1, tzinfo=timezone.utc), started_at)]
+        
+        step = (started_at - start) / count
+        bounds = [start + step * i for i in range(count)] + [started_at]
+        return [self._backfill_window(low, high) for low, high in zip(bounds, bounds[1:])]
+    
+    async def _iter_window_pages(self, table: str, window: Dict, split: List[Dict],
+                                 page_times: Optional[Dict[int, datetime]] = None
+                                 ) -> AsyncIterator[Tuple[int, List[Dict]]]:
+        """Yield pages of records modified within a backfill window, oldest first
+        
+        Reading starts at the window's cursor when it has one. The latest
+        Modified_Time on each page is recorded in `page_times`, if given.
+        Reads at most settings.backfill_window_max_pages pages; if the window
+        holds more, the unread remainder is split in two and appended to
+        `split` instead, so busy stretches of history spread across workers.
+        """
+        # Resume from a timestamp rather than a page number: edits made since
+        # move records to the end of the sort order, which would shift pages
+        start = self._utc_timestamp(window.get("cursor") or window["start"])
+        end = self._utc_timestamp(window["end"])
+        min_width = timedelta(seconds=settings.backfill_min_window_seconds)
+        pages = self.zoho_client.iter_pages(
+            self.zoho_client.ENTITY_ENDPOINTS[table],
+            # Step back a second so records modified exactly at the start are included
+            start - timedelta(seconds=1),
+            sort_by="Modified_Time"
+        )
+        read = 0
         try:
-            # Get records that were modified in Supabase
-            modified_work_orders = await self.supabase_client.get_records(
-                "zoho_fsm", "work_orders",
-                {"sync_status": "pending", "source": "supabase"}
+            async for page_number, page in pages:
+                records = []
+                last = None
+                past_end = False
+                for record in page:
+                    modified_time = self._utc_timestamp(record.get("Modified_Time"))
+                    if modified_time is None:
+                        records.append(record)  # can't be placed; writing it twice is harmless
+                    elif modified_time >= end:
+                        past_end = True
+                    elif modified_time >= start:
+                        records.append(record)
+                        last = modified_time
+                
+                if last is not None and page_times is not None:
+                    page_times[page_number] = last
+                yield page_number, records
+                read += 1
+                if past_end:
+                    return
+                if (read >= settings.backfill_window_max_pages and last is not None
+                        and last > start and end - last >= 2 * min_width):
+                    # Records at `last` may straddle pages, so the remainder starts there
+                    middle = last + (end - last) / 2
+                    split.extend([
+                        self._backfill_window(last, middle),
+                        self._backfill_window(middle, end)
+                    ])
+                    return
+        finally:
+            await pages.aclose()
+    
+    async def _backfill_fsm_entity(self, table: str, checkpoint: Optional[Dict] = None) -> int:
+        """Load every record of one FSM entity, returning rows written
+        
+        History is split into Modified_Time windows that load in parallel
+        (settings.backfill_window_concurrency per entity) under the Zoho rate
+        limiter; windows holding too many records are subdivided as they are
+        read. Each window's status and Modified_Time cursor are checkpointed, so
+        after a restart completed windows are skipped and the rest continue
+        from the last fully written timestamp. Once every window completes,
+        the entity's watermark is set to when the backfill started, so the
+        incremental sync picks up anything changed meanwhile.
+        """
+        if checkpoint and checkpoint.get("status") == "running" and checkpoint.get("windows"):
+            windows = checkpoint["windows"]
+            written_before = checkpoint.get("records_written") or 0
+            started_at = self._utc_timestamp(checkpoint.get("started_at"))
+            remaining = sum(1 for window in windows if window["status"] != "complete")
+            logger.info(f"Resuming {table} backfill: {remaining} of {len(windows)} windows left")
+        else:
+            started_at = datetime.now(timezone.utc)
+            windows = await self._backfill_windows(table, started_at)
+            written_before = 0
+            await self.supabase_client.save_sync_checkpoint(
+                "zoho_fsm", table, "running", windows, 0, started_at.isoformat()
             )
-            
-            for work_order in modified_work_orders:
-                try:
-                    if work_order.get("zoho_id"):
-                        # Update in Zoho
-                        await self.zoho_client.update_work_order(
-                            work_order["zoho_id"], work_order
-                        )
-                    else:
-                        # Create in Zoho
-                        result = await self.zoho_client.create_work_order(work_order)
-                        # Update Supabase record with Zoho ID
-                        work_order["zoho_id"] = result["id"]
-                    
-                    # Mark as synced
-                    work_order["sync_status"] = "synced"
-                    work_order["source"] = "zoho"
-                    await self.supabase_client.upsert_record(
-                        "zoho_fsm", "work_orders", work_order, "id"
-                    )
-                    
-                except Exception as e:
-                    logger.error(f"Error syncing work order {work_order.get('id')}: {e}")
-                    work_order["sync_status"] = "error"
-                    work_order["error_message"] = str(e)
-                    await self.supabase_client.upsert_record(
-                        "zoho_fsm", "work_orders", work_order, "id"
-                    )
-            
-            # Sync customers
-            modified_customers = await self.supabase_client.get_records(
-                "zoho_fsm", "customers",
-                {"sync_status": "pending", "source": "supabase"}
+        
+        await self._load_content_hashes(table)
+        
+        lock = asyncio.Lock()
+        semaphore = asyncio.Semaphore(max(settings.backfill_window_concurrency, 1))
+        totals = {"written": written_before}
+        
+        async def save(status: str = "running"):
+            await self.supabase_client.save_sync_checkpoint(
+                "zoho_fsm", table, status,
+                sorted(windows, key=lambda window: window["start"]), totals["written"]
             )
+        
+        async def run_window(window: Dict):
+            split = []
+            page_times: Dict[int, datetime] = {}
+            reported = 0
             
-            for customer in modified_customers:
-                try:
-                    if customer.get("zoho_id"):
-                        await self.zoho_client.update_customer(
-                            customer["zoho_id"], customer
-                        )
-                    else:
-                        result = await self.zoho_client.create_customer(customer)
-                        customer["zoho_id"] = result["id"]
-                    
-                    customer["sync_status"] = "synced"
-                    customer["source"] = "zoho"
-                    await self.supabase_client.upsert_record(
-                        "zoho_fsm", "customers", customer, "id"
-                    )
-                    
-                except Exception as e:
-                    logger.error(f"Error syncing customer {customer.get('id')}: {e}")
-                    customer["sync_status"] = "error"
-                    customer["error_message"] = str(e)
-                    await self.supabase_client.upsert_record(
-                        "zoho_fsm", "customers", customer, "id"
-                    )
+            async def save_progress(next_page: int, written: int):
+                nonlocal reported
+                async with lock:
+                    # Pages are sorted by Modified_Time, so the last one written sets the cursor
+                    done = [page for page in page_times if page < next_page]
+                    if done:
+                        window["cursor"] = page_times[max(done)].isoformat()
+                        for page in done:
+                            del page_times[page]
+                    totals["written"] += written - reported
+                    reported = written
+                    await save()
             
-            # Sync technicians
-            modified_technicians = await self.supabase_client.get_records(
-                "zoho_fsm", "technicians",
-                {"sync_status": "pending", "source": "supabase"}
-            )
+            async with semaphore:
+                result = await self._run_fsm_pipeline(
+                    table, self._iter_window_pages(table, window, split, page_times),
+                    on_progress=save_progress
+                )
             
-            for technician in modified_technicians:
-                try:
-                    if technician.get("zoho_id"):
-                        await self.zoho_client.update_technician(
-                            technician["zoho_id"], technician
+            async with lock:
+                totals["written"] += result["written"] - reported
+                if split:
+                    # Keep the part already read as a completed window of its own
+                    window["end"] = split[0]["start"]
+                    windows.extend(split)
+                window["status"] = "complete"
+                await save()
+            if split:
+                await self._run_stages(*(run_window(part) for part in split))
+        
+        await self._run_stages(*(
+            run_window(window) for window in list(windows) if window["status"] != "complete"
+        ))
+        
+        await self.supabase_client.update_sync_status(
+            "zoho_fsm", table, started_at.isoformat(), "success"
+        )
+        await save("complete")
+        return totals["written"] - written_before
+    
+    @staticmethod
+    def _id_digest(zoho_id) -> int:
+        """64-bit digest of a Zoho ID, for compact ID sets"""
+        digest = hashlib.blake2b(str(zoho_id).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+    
+    async def _reconcile_fsm_entity(self, table: str) -> int:
+        """Soft-delete rows of one FSM entity that are gone from Zoho, returning how many
+        
+        Zoho's ID list is streamed into a sorted array of 64-bit digests, 8
+        bytes per record, and each Supabase zoho_id is looked up by binary
+        search. A digest collision can only hide a deletion, never delete a
+        live record. Paging can skip records that move while the listing runs,
+        so each row missing from it is confirmed gone with a fetch of its own
+        before it is soft-deleted. Rows created after the listing started are
+        left alone, and soft-deleted rows whose ID is listed again are restored.
+        """
+        listed_at = datetime.now(timezone.utc)
+        digests = array("Q")
+        async for _, page in self.zoho_client.iter_pages(
+            self.zoho_client.ENTITY_ENDPOINTS[table], fields="id"
+        ):
+            digests.extend(self._id_digest(record["id"]) for record in page if record.get("id"))
+        digests = array("Q", sorted(digests))
+        
+        def listed(zoho_id) -> bool:
+            digest = self._id_digest(zoho_id)
+            index = bisect_left(digests, digest)
+            return index < len(digests) and digests[index] == digest
+        
+        missing = []
+        reappeared = []
+        live = 0
+        async for page in self.supabase_client.iter_zoho_ids(
+            "zoho_fsm", table, before=listed_at.isoformat()
+        ):
+            for row in page:
+                present = listed(row["zoho_id"])
+                if row.get("deleted"):
+                    if present:
+                        reappeared.append(row["zoho_id"])
+                else:
+                    live += 1
+                    if not present:
+                        missing.append(row["zoho_id"])
+        
+        # A truncated or failed listing looks like a mass deletion; don't act on it
+        if missing and len(missing) > live * settings.reconcile_max_delete_fraction:
+            raise RuntimeError(
+                f"{len(missing)} of {live} rows are missing from Zoho, more than "
+                f"reconcile_max_delete_fraction allows; not soft-deleting"
+            )
+        
+        missing = await self._confirm_deleted(table, missing)
+        deleted = await self.supabase_client.set_records_deleted("zoho_fsm", table, missing)
+        hashes = self.content_hashes.get(table)
+        if hashes:
+            for zoho_id in deleted:
+                hashes.pop(zoho_id, None)
+        
+        restored = await self.supabase_client.set_records_deleted(
+            "zoho_fsm", table, reappeared, deleted=False
+        )
+        if restored:
+            logger.info(f"Restored {len(restored)} {table} rows that reappeared in Zoho")
+        return len(deleted)
+    
+    async def _confirm_deleted(self, table: str, zoho_ids: List[str]) -> List[str]:
+        """The IDs Zoho no longer returns when fetched one by one
+        
+        Each fetch costs an API credit, so at most
+        settings.reconcile_max_confirmations IDs are checked per run, and
+        never more than the background share of today's credits. A random
+        sample is checked; the rest stay missing from the listing and are
+        picked up by later runs. IDs whose fetch fails are kept, since they
+        may still exist.
+        """
+        budget = zoho_rate_limiter.credits_remaining - settings.zoho_priority_credit_reserve
+        limit = max(min(settings.reconcile_max_confirmations, budget), 0)
+        if len(zoho_ids) > limit:
+            logger.info(f"Confirming {limit} of {len(zoho_ids)} {table} deletion candidates; "
+                        f"the rest wait for the next reconciliation")
+            zoho_ids = random.sample(zoho_ids, limit)
+        
+        semaphore = asyncio.Semaphore(settings.sync_max_concurrency)
+        
+        async def fetch(zoho_id: str) -> Optional[Dict]:
+            async with semaphore:
+                return await self.zoho_client.get_record(table, zoho_id)
+        
+        fetched = await asyncio.gather(*(fetch(zoho_id) for zoho_id in zoho_ids), return_exceptions=True)
+        gone = []
+        for zoho_id, record in zip(zoho_ids, fetched):
+            if isinstance(record, Exception):
+                logger.error(f"Error confirming deletion of {table} record {zoho_id}: {record}")
+            elif record is None:
+                gone.append(zoho_id)
+        if len(gone) < len(zoho_ids):
+            logger.info(f"{len(zoho_ids) - len(gone)} {table} rows missing from the listing still exist in Zoho")
+        return gone
+    
+    @staticmethod
+    def _bucket_digest(zoho_id, epoch: int) -> int:
+        """64-bit digest of a record's ID and Modified_Time, as get_bucket_digests computes it
+        
+        Supabase reads the time from synced_snapshot's modified_time column.
+        """
+        return int(hashlib.md5(f"{zoho_id}|{epoch}".encode("utf-8")).hexdigest()[:16], 16)
+    
+    async def _verify_fsm_entity(self, table: str) -> int:
+        """Check one FSM entity against Zoho bucket by bucket, returning rows repaired
+        
+        Zoho is listed with only id and Modified_Time, and records are grouped
+        into settings.verify_bucket_seconds wide Modified_Time buckets. Each
+        bucket gets a count and an XOR of per-record digests, which Supabase
+        computes for the same buckets in SQL. Only buckets whose checksums
+        differ are re-read from Zoho and rewritten. Rows deleted in Zoho are
+        left to reconcile_deletions.
+        """
+        width = max(settings.verify_bucket_seconds, 1)
+        before_epoch = math.floor(datetime.now(timezone.utc).timestamp())
+        
+        buckets: Dict[int, List[int]] = {}
+        async for _, page in self.zoho_client.iter_pages(
+            self.zoho_client.ENTITY_ENDPOINTS[table], fields="id,Modified_Time"
+        ):
+            for record in page:
+                if not record.get("id"):
+                    continue
+                modified_time = self._utc_timestamp(record.get("Modified_Time"))
+                epoch = math.floor(modified_time.timestamp()) if modified_time else 0
+                if epoch >= before_epoch:
+                    continue  # changed since the check began; the delta sync covers it
+                bucket = buckets.setdefault(epoch // width, [0, 0])
+                bucket[0] += 1
+                bucket[1] ^= self._bucket_digest(record["id"], epoch)
+        
+        stored = await self.supabase_client.get_bucket_digests(
+            "zoho_fsm", table, width, before_epoch
+        )
+        mismatched = []
+        for bucket in sorted(set(buckets) | {int(key) for key in stored}):
+            count, digest = buckets.get(bucket, (0, 0))
+            theirs = stored.get(str(bucket)) or {}
+            # Postgres returns the digest as a signed bigint
+            if count != theirs.get("count", 0) or digest != (theirs.get("digest", 0) & 0xFFFFFFFFFFFFFFFF):
+                mismatched.append(bucket)
+        
+        logger.info(f"{table}: {len(mismatched)} of {len(buckets)} checksum buckets differ from Zoho")
+        if not mismatched:
+            return 0
+        
+        # Rewrite every record in the bucket: a row can be missing or stale
+        # even when the hash index says it's current
+        await self._load_content_hashes(table)
+        repaired = 0
+        for bucket in mismatched:
+            start = datetime.fromtimestamp(bucket * width, timezone.utc)
+            windows = [self._backfill_window(start, start + timedelta(seconds=width))]
+            while windows:
+                result = await self._run_fsm_pipeline(
+                    table, self._iter_window_pages(table, windows.pop(), windows), force=True
+                )
+                repaired += result["written"]
+        return repaired
+    
+    async def sync_fsm_records(self, table: str, records: List[Dict]) -> int:
+        """Upsert specific Zoho records into zoho_fsm.<table>, returning rows written
+        
+        Used for webhook-driven updates; the entity's watermark is left alone
+        since these records are not a complete delta.
+        """
+        await self._load_content_hashes(table)
+        batch = [
+            prepared for prepared in
+            (self._prepare_fsm_record(table, record) for record in records)
+            if prepared is not None
+        ]
+        
+        count = 0
+        for start in range(0, len(batch), settings.batch_size):
+            count += await self._write_fsm_batch(table, batch[start:start + settings.batch_size])
+        return count
+    
+    @classmethod
+    def _webhook_entity(cls, event_type: str) -> Optional[str]:
+        """Map a webhook event type such as "work_order_updated" to an FSM table"""
+        for table in cls.FSM_ENTITIES:
+            # work_orders -> work_order_, appointments -> appointment_
+            if event_type.startswith(table[:-1] + "_"):
+                return table
+        return None
+    
+    @classmethod
+    def webhook_key(cls, event_type: str, payload: Dict) -> str:
+        """Key identifying what a webhook is about, used to debounce repeats"""
+        ids = sorted(str(record["id"]) for record in cls.webhook_records(payload))
+        return f"{event_type}:{','.join(ids)}"
+    
+    @staticmethod
+    def webhook_records(payload: Dict) -> List[Dict]:
+        """Pull the changed records (or bare IDs) out of a webhook payload"""
+        if "data" in payload and isinstance(payload["data"], (list, dict)):
+            items = payload["data"] if isinstance(payload["data"], list) else [payload["data"]]
+        elif "ids" in payload and isinstance(payload["ids"], list):
+            items = payload["ids"]
+        else:
+            items = [payload]
+        
+        records = []
+        for item in items:
+            if isinstance(item, dict) and item.get("id"):
+                records.append(item)
+            elif isinstance(item, (str, int)):
+                records.append({"id": str(item)})
+        return records
+    
+    async def handle_webhook_event(self, event_type: str, payload: Dict) -> Dict:
+        """Apply a Zoho webhook by upserting just the records it names
+        
+        Records without a full payload (no Modified_Time) are fetched by ID.
+        Other actions, or payloads without record IDs, fall back to an
+        incremental sync of their entity, or of all FSM entities if the
+        entity is unknown.
+        """
+        table = self._webhook_entity(event_type)
+        action = event_type.rsplit("_", 1)[-1]
+        records = self.webhook_records(payload) if table and action in ("created", "updated") else []
+        
+        if not records:
+            run = self.coordinator.request("fsm", tables=[table] if table else None)
+            return {"mode": "incremental", "table": table, "run_id": run.id}
+        
+        complete = [record for record in records if "Modified_Time" in record]
+        partial = [record["id"] for record in records if "Modified_Time" not in record]
+        # Fetch each record on its own so one bad ID doesn't fail the rest
+        fetched = await asyncio.gather(*(
+            self.zoho_client.get_record(table, record_id, priority=True)
+            for record_id in partial
+        ), return_exceptions=True)
+        failed = []
+        for record_id, record in zip(partial, fetched):
+            if isinstance(record, Exception):
+                logger.error(f"Error fetching {table} record {record_id} for webhook: {record}")
+                failed.append(record_id)
+            elif record:
+                complete.append(record)
+        
+        written = await self.sync_fsm_records(table, complete)
+        logger.info(f"Webhook {event_type}: {len(records)} record(s) received, "
+                    f"{len(partial)} fetched, {written} written")
+        result = {"mode": "records", "table": table, "records": written}
+        if failed:
+            # Leave records Zoho wouldn't return to an incremental sync of the entity
+            result["run_id"] = self.coordinator.request("fsm", tables=[table]).id
+        return result
+    
+    async def sync_from_supabase_to_zoho(self) -> Dict[str, int]:
+        """Sync changes from Supabase back to Zoho
+        
+        Work comes from the trigger-fed outbox rather than a table scan, so an
+        idle run costs one small indexed query per entity.
+        """
+        logger.info("Starting Supabase to Zoho sync...")
+        
+        async with self._reverse_sync_lock:
+            try:
+                counts = {}
+                for table in self.REVERSE_SYNC_ENTITIES:
+                    counts[table] = 0
+                    while True:
+                        # Get records that were modified in Supabase
+                        claim = await self.supabase_client.claim_outbox(
+                            "zoho_fsm", table, settings.batch_size
                         )
-                    else:
-                        result = await self.zoho_client.create_technician(technician)
-                        technician["zoho_id"] = result["id"]
-                    
-                    technician["sync_status"] = "synced"
-                    technician["source"] = "zoho"
-                    await self.supabase_client.upsert_record(
-                        "zoho_fsm", "technicians", technician, "id"
-                    )
-                    
-                except Exception as e:
-                    logger.error(f"Error syncing technician {technician.get('id')}: {e}")
-                    technician["sync_status"] = "error"
-                    technician["error_message"] = str(e)
-                    await self.supabase_client.upsert_record(
-                        "zoho_fsm", "technicians", technician, "id"
-                    )
-            
-            logger.info(f"Supabase to Zoho sync completed: {len(modified_work_orders)} work orders, "
-                       f"{len(modified_customers)} customers, {len(modified_technicians)} technicians")
-            
-        except Exception as e:
-            logger.error(f"Error during Supabase to Zoho sync: {e}")
-            raise
+                        if not claim["rows"]:
+                            break
+                        counts[table] += await self._push_to_zoho(
+                            table, claim["rows"], claim["versions"]
+                        )
+                
+                logger.info(f"Supabase to Zoho sync completed: {counts['work_orders']} work orders, "
+                           f"{counts['customers']} customers, {counts['technicians']} technicians")
+                return counts
+                
+            except Exception as e:
+                logger.error(f"Error during Supabase to Zoho sync: {e}")
+                raise
+    
+    @classmethod
+    def _zoho_fields(cls, row: Dict) -> Dict:
+        """The part of a row that maps onto Zoho fields"""
+        return {key: value for key, value in row.items() if key not in cls.LOCAL_FIELDS}
+    
+    @classmethod
+    def _zoho_writable(cls, row: Dict) -> Dict:
+        """The Zoho fields of a row that Zoho accepts in writes"""
+        return {
+            key: value for key, value in cls._zoho_fields(row).items()
+            if key not in cls.ZOHO_READ_ONLY_FIELDS
+        }
+    
+    @classmethod
+    def _same_value(cls, ours, theirs) -> bool:
+        """Whether two renderings of a field value are equal
+        
+        Snapshots taken on the forward path hold Zoho's strings, while rows
+        read back from Postgres hold its own rendering of typed columns, so
+        timestamps are compared as instants and numbers as numbers.
+        """
+        if ours == theirs:
+            return True
+        if isinstance(ours, str) and isinstance(theirs, str):
+            ours_time, theirs_time = cls._parse_timestamp(ours), cls._parse_timestamp(theirs)
+            return (ours_time is not None and theirs_time is not None
+                    and cls._utc_timestamp(ours_time) == cls._utc_timestamp(theirs_time))
+        if isinstance(ours, bool) or isinstance(theirs, bool):
+            return False
+        if isinstance(ours, (int, float)) or isinstance(theirs, (int, float)):
+            try:
+                return float(ours) == float(theirs)
+            except (TypeError, ValueError):
+                return False
+        return False
     
-    async def run_sync_cycle(self):
+    @classmethod
+    def _zoho_changes(cls, row: Dict) -> Dict:
+        """Writable Zoho fields that differ from the row's last-synced snapshot
+        
+        Rows without a snapshot can't be diffed, so all their fields count.
+        """
+        fields = cls._zoho_writable(row)
+        snapshot = row.get("synced_snapshot")
+        if not isinstance(snapshot, dict):
+            return fields
+        return {
+            key: value for key, value in fields.items()
+            if not cls._same_value(value, snapshot.get(key))
+        }
+    
+    @staticmethod
+    def _zoho_payload(row: Dict, fields: Dict) -> Dict:
+        """Key column-form fields by their Zoho API names
+        
+        Names come from the row's raw_data, which keeps Zoho's own keys.
+        Columns Zoho hasn't sent yet, such as on rows created in Supabase,
+        fall back to its Capitalized_Snake_Case convention.
+        """
+        raw = row.get("raw_data")
+        names = {key.lower(): key for key in raw} if isinstance(raw, dict) else {}
+        return {
+            names.get(column) or "_".join(part.capitalize() for part in column.split("_")): value
+            for column, value in fields.items()
+        }
+    
+    @staticmethod
+    def _zoho_result_ok(result: Dict) -> bool:
+        """Whether a per-record result from a Zoho bulk write succeeded"""
+        return str(result.get("status", "")).lower() == "success" or result.get("code") == "SUCCESS"
+    
+    async def _push_to_zoho(self, table: str, rows: List[Dict], versions: Dict[str, int]) -> int:
+        """Write claimed Supabase rows to Zoho in bulk and flip their status in one update
+        
+        Updates carry only the fields changed since the last sync. Rows edited
+        again while the push was in flight stay pending for the next claim.
+        Returns the number of rows now in sync with Zoho.
+        """
+        creates = [row for row in rows if not row.get("zoho_id")]
+        updates = []
+        unchanged = []
+        for row in rows:
+            if not row.get("zoho_id"):
+                continue
+            # Only send fields changed since the last sync; skip no-op updates
+            changes = self._zoho_changes(row)
+            if changes:
+                updates.append((row, {**self._zoho_payload(row, changes), "id": row["zoho_id"]}))
+            else:
+                unchanged.append(row)
+        
+        results = [(row, {"status": "success"}) for row in unchanged]
+        if updates:
+            results += zip([row for row, _ in updates], await self.zoho_client.bulk_update(
+                table, [payload for _, payload in updates]
+            ))
+        if creates:
+            results += zip(creates, await self.zoho_client.bulk_create(
+                table, [self._zoho_payload(row, self._zoho_writable(row)) for row in creates]
+            ))
+        
+        status_rows = []
+        for row, result in results:
+            if self._zoho_result_ok(result):
+                # Mark as synced, recording the Zoho ID of newly created records
+                status_rows.append({
+                    "id": row["id"],
+                    "zoho_id": row.get("zoho_id") or result.get("details", {}).get("id"),
+                    "sync_status": "synced",
+                    "source": "zoho",
+                    "error_message": None,
+                    "synced_snapshot": self._zoho_fields(row)
+                })
+            else:
+                error = result.get("message") or result.get("code") or "Unknown Zoho error"
+                logger.error(f"Error syncing {table} record {row.get('id')}: {error}")
+                # Every status row carries the same columns, since the bulk
+                # update writes each column present in any row
+                status_rows.append({
+                    "id": row["id"],
+                    "zoho_id": row.get("zoho_id"),
+                    "sync_status": "error",
+                    "source": row.get("source"),
+                    "error_message": str(error),
+                    "synced_snapshot": row.get("synced_snapshot")
+                })
+        
+        # Flip status and close the claimed outbox entries together, skipping
+        # rows whose outbox version moved on since the claim
+        return await self.supabase_client.complete_outbox("zoho_fsm", table, status_rows, versions)
+    
+    async def run_sync_cycle(self) -> Dict[str, Dict]:
         """Run a complete sync cycle"""
         logger.info("Starting sync cycle...")
         
         try:
             # Sync from Zoho to Supabase
-            await self.sync_fsm_data()
+            results = await self.sync_fsm_data()
             
             # Sync from Supabase to Zoho
             await self.sync_from_supabase_to_zoho()
             
             logger.info("Sync cycle completed successfully")
+            return results
             
         except Exception as e:
             logger.error(f"Error during sync cycle: {e}")
@@ -240,23 +984,66 @@ class SyncManager:
     
     async def start_continuous_sync(self):
         """Start continuous sync with specified interval"""
+        if self.is_running:
+            logger.info("Continuous sync already running")
+            return
         self.is_running = True
         logger.info(f"Starting continuous sync with {settings.sync_interval}s interval")
+        # Full-table checks that list every Zoho ID run on slower schedules
+        periodic = {
+            self.reconcile_deletions: settings.reconcile_interval,
+            self.verify_integrity: settings.verify_interval
+        }
         
         while self.is_running:
+            # Go through the coordinator so scheduled runs never overlap manual ones
+            run = await self.coordinator.wait(self.coordinator.request("cycle"))
+            if run.status == "error":
+                await asyncio.sleep(60)  # Wait 1 minute before retrying
+                continue
+            
+            for job, interval in periodic.items():
+                await self._run_periodic_job(job, interval)
+            await asyncio.sleep(settings.sync_interval)
+    
+    async def _run_periodic_job(self, job, interval: int) -> None:
+        """Run a slow-schedule job if `interval` seconds have passed since its last run
+        
+        Last run times are kept in sync_status as "jobs.<name>", so the
+        schedule survives restarts instead of starting over with each deploy.
+        Failed runs count too, so a failing job waits a full interval.
+        """
+        name = job.__name__
+        try:
+            status = await self.supabase_client.get_sync_status("jobs", name)
+            last_run = self._utc_timestamp(status.get("last_sync")) if status else None
+            started_at = datetime.now(timezone.utc)
+            if last_run is not None and started_at < last_run + timedelta(seconds=interval):
+                return
+            
             try:
-                await self.run_sync_cycle()
-                await asyncio.sleep(settings.sync_interval)
+                results = await job()
+                failed = any(result["status"] == "error" for result in results.values())
             except Exception as e:
-                logger.error(f"Error in continuous sync: {e}")
-                await asyncio.sleep(60)  # Wait 1 minute before retrying
+                logger.error(f"Error during {name}: {e}")
+                failed = True
+            await self.supabase_client.update_sync_status(
+                "jobs", name, started_at.isoformat(), "error" if failed else "success"
+            )
+        except Exception as e:
+            logger.error(f"Could not schedule {name}: {e}")
     
     async def stop_continuous_sync(self):
         """Stop continuous sync"""
         self.is_running = False
         logger.info("Continuous sync stopped")
     
-    async def trigger_manual_sync(self):
-        """Trigger a manual sync"""
+    async def trigger_manual_sync(self) -> SyncRun:
+        """Trigger a manual sync, coalescing with any run already in progress"""
         logger.info("Manual sync triggered")
-        await self.run_sync_cycle() 
\ No newline at end of file
+        return self.coordinator.request("cycle")
+    
+    async def trigger_backfill(self, tables: Optional[Iterable[str]] = None) -> SyncRun:
+        """Trigger a checkpointed full load, resuming any unfinished one"""
+        logger.info("Backfill triggered")
+        return self.coordinator.request("backfill", tables=tables)
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from loguru import logger
+from .config import settings
+
+class WebhookQueue:
+    """Durable local queue of received webhook events, backed by SQLite
+
+    Events are appended as they arrive and survive restarts until the
+    consumer marks them done. Each event carries a dedupe key so repeat
+    events for the same record can be collapsed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS webhook_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_type TEXT NOT NULL,
+                dedupe_key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                received_at REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error_message TEXT
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_webhook_events_pending "
+            "ON webhook_events (status, dedupe_key, received_at)"
+        )
+
+    def _append(self, event_type: str, dedupe_key: str, payload: Dict) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO webhook_events (event_type, dedupe_key, payload, received_at) "
+                "VALUES (?, ?, ?, ?)",
+                (event_type, dedupe_key, json.dumps(payload, default=str), time.time())
+            )
+            return cursor.lastrowid
+
+    def _claim(self, quiet_seconds: float, limit: int) -> List[Dict]:
+        """Latest pending event per key whose key has been quiet for `quiet_seconds`"""
+        cutoff = time.time() - quiet_seconds
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT e.id, e.event_type, e.dedupe_key, e.payload, e.attempts,
+                       (SELECT group_concat(o.id) FROM webhook_events o
+                        WHERE o.dedupe_key = e.dedupe_key AND o.status = 'pending') AS ids
+                FROM webhook_events e
+                WHERE e.status = 'pending'
+                  AND e.id = (SELECT max(l.id) FROM webhook_events l
+                              WHERE l.dedupe_key = e.dedupe_key AND l.status = 'pending')
+                  AND e.received_at <= ?
+                ORDER BY e.id
+                LIMIT ?
+            """, (cutoff, limit)).fetchall()
+        return [
+            {
+                "id": row[0],
+                "event_type": row[1],
+                "dedupe_key": row[2],
+                "payload": json.loads(row[3]),
+                "attempts": row[4],
+                "ids": [int(event_id) for event_id in row[5].split(",")]
+            }
+            for row in rows
+        ]
+
+    def _complete(self, ids: List[int]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE webhook_events SET status = 'done' WHERE id = ?",
+                [(event_id,) for event_id in ids]
+            )
+
+    def _fail(self, ids: List[int], error: str, max_attempts: int) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE webhook_events SET attempts = attempts + 1, error_message = ?, "
+                "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END, "
+                # Push the retry back by one debounce window
+                "received_at = ? "
+                "WHERE id = ?",
+                [(error, max_attempts, time.time(), event_id) for event_id in ids]
+            )
+
+    def _purge(self, older_than_seconds: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM webhook_events WHERE status = 'done' AND received_at < ?",
+                (time.time() - older_than_seconds,)
+            )
+
+    def _stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, count(*) FROM webhook_events GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+    async def append(self, event_type: str, dedupe_key: str, payload: Dict) -> int:
+        """Durably record an event, returning its id"""
+        return await asyncio.to_thread(self._append, event_type, dedupe_key, payload)
+
+    async def claim(self, quiet_seconds: float, limit: int) -> List[Dict]:
+        """Get ready events, collapsed to the latest per dedupe key"""
+        return await asyncio.to_thread(self._claim, quiet_seconds, limit)
+
+    async def complete(self, ids: List[int]) -> None:
+        """Mark events as processed"""
+        await asyncio.to_thread(self._complete, ids)
+
+    async def fail(self, ids: List[int], error: str, max_attempts: int) -> None:
+        """Record a failed attempt, giving up after `max_attempts`"""
+        await asyncio.to_thread(self._fail, ids, error, max_attempts)
+
+    async def purge(self, older_than_seconds: float) -> None:
+        """Delete processed events older than the given age"""
+        await asyncio.to_thread(self._purge, older_than_seconds)
+
+    async def stats(self) -> Dict[str, int]:
+        """Event counts by status"""
+        return await asyncio.to_thread(self._stats)
+
+    def close(self) -> None:
+        """Close the SQLite connection"""
+        with self._lock:
+            self._conn.close()
+
+class WebhookConsumer:
+    """Background worker that drains the webhook queue in debounced batches"""
+
+    def __init__(self, queue: WebhookQueue, sync_manager):
+        self.queue = queue
+        self.sync_manager = sync_manager
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start consuming in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop consuming; unprocessed events stay queued for the next start"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        last_purge = 0.0
+        while True:
+            try:
+                processed = await self.process_batch()
+                if time.monotonic() - last_purge > 3600:
+                    await self.queue.purge(settings.webhook_retention_seconds)
+                    last_purge = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in webhook consumer: {e}")
+                processed = 0
+            if not processed:
+                await asyncio.sleep(settings.webhook_poll_interval)
+
+    async def process_batch(self) -> int:
+        """Process one batch of ready events, returning how many keys were handled"""
+        events = await self.queue.claim(
+            settings.webhook_debounce_seconds, settings.webhook_batch_size
+        )
+        if not events:
+            return 0
+
+        # Merge record-level events of the same type into one targeted sync
+        by_type: Dict[str, List[Dict]] = {}
+        for event in events:
+            by_type.setdefault(event["event_type"], []).append(event)
+
+        for event_type, group in by_type.items():
+            ids = [event_id for event in group for event_id in event["ids"]]
+            records = []
+            entity_level = False
+            for event in group:
+                event_records = self.sync_manager.webhook_records(event["payload"])
+                records.extend(event_records)
+                entity_level = entity_level or not event_records
+            try:
+                if records:
+                    await self.sync_manager.handle_webhook_event(event_type, {"data": records})
+                if entity_level:
+                    await self.sync_manager.handle_webhook_event(event_type, {})
+                await self.queue.complete(ids)
+            except Exception as e:
+                logger.error(f"Error processing {len(group)} {event_type} webhook(s): {e}")
+                await self.queue.fail(ids, str(e), settings.max_retries)
+
+        return len(events)
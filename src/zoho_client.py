@@ -1,11 +1,30 @@
 import httpx
 import asyncio
-from typing import Dict, List, Optional, Any
+import json
+import os
+from typing import Dict, List, Optional, Any, AsyncIterator, Tuple
 from loguru import logger
 from .config import settings
-from datetime import datetime, timedelta
+from .rate_limiter import zoho_rate_limiter
+from .retry import RetryPolicy
+from datetime import datetime, timedelta, timezone
+
+class ZohoAPIError(Exception):
+    """Raised when Zoho answers a request with an error status"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
 
 class ZohoClient:
+    # FSM entity (Supabase table name) -> Zoho list endpoint
+    ENTITY_ENDPOINTS = {
+        "work_orders": "fsm/v1/workorders",
+        "customers": "fsm/v1/customers",
+        "technicians": "fsm/v1/technicians",
+        "appointments": "fsm/v1/appointments"
+    }
+    
     def __init__(self):
         self.base_url = settings.zoho_base_url
         self.client_id = settings.zoho_client_id
@@ -13,17 +32,105 @@ class ZohoClient:
         self.refresh_token = settings.zoho_refresh_token
         self.org_id = settings.zoho_org_id
         self.access_token = None
-        self.token_expires_at = None
+        self.token_expires_at: Optional[datetime] = None
+        self._rejected_token: Optional[str] = None
+        self._token_lock = asyncio.Lock()
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self.retry_policy = RetryPolicy(
+            max_retries=settings.max_retries,
+            base_delay=settings.retry_base_delay,
+            max_delay=settings.retry_max_delay
+        )
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the shared keep-alive HTTP client, creating it on first use"""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                http2=settings.zoho_http2,
+                timeout=settings.zoho_timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.zoho_max_connections,
+                    max_keepalive_connections=settings.zoho_max_keepalive_connections,
+                    keepalive_expiry=settings.zoho_keepalive_expiry
+                )
+            )
+        return self._http_client
+    
+    async def close(self) -> None:
+        """Close the shared HTTP client and its pooled connections"""
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+        self._http_client = None
         
+    def _token_is_fresh(self) -> bool:
+        """Whether the cached token is valid beyond the proactive refresh margin"""
+        return bool(
+            self.access_token and self.token_expires_at and
+            datetime.now(timezone.utc) + timedelta(seconds=settings.zoho_token_refresh_margin)
+            < self.token_expires_at
+        )
+    
+    def _load_cached_token(self) -> None:
+        """Adopt a token persisted by a previous run or another worker"""
+        path = settings.zoho_token_cache_file
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                cached = json.load(f)
+            if cached.get("access_token") == self._rejected_token:
+                return
+            self.access_token = cached["access_token"]
+            self.token_expires_at = datetime.fromisoformat(cached["expires_at"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable Zoho token cache {path}: {e}")
+    
+    def _save_cached_token(self) -> None:
+        """Persist the current token so restarts and other workers can reuse it"""
+        path = settings.zoho_token_cache_file
+        if not path:
+            return
+        tmp_path = f"{path}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump({
+                    "access_token": self.access_token,
+                    "expires_at": self.token_expires_at.isoformat()
+                }, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not persist Zoho token cache {path}: {e}")
+    
+    def _invalidate_token(self, token: str) -> None:
+        """Drop a token Zoho has rejected so the next call refreshes it"""
+        self._rejected_token = token
+        # Another coroutine may already have replaced it with a fresh one
+        if self.access_token == token:
+            self.access_token = None
+            self.token_expires_at = None
+    
     async def _get_access_token(self) -> str:
-        """Get or refresh access token"""
-        if (self.access_token and self.token_expires_at and 
-            datetime.now() < self.token_expires_at):
+        """Get or refresh access token
+        
+        Only one refresh runs at a time; concurrent callers wait for it and
+        reuse the result. Tokens are refreshed ahead of expiry and persisted
+        to settings.zoho_token_cache_file.
+        """
+        if self._token_is_fresh():
             return self.access_token
+        
+        async with self._token_lock:
+            # Another coroutine, process or earlier run may already have refreshed
+            if self._token_is_fresh():
+                return self.access_token
+            self._load_cached_token()
+            if self._token_is_fresh():
+                return self.access_token
             
-        async with httpx.AsyncClient() as client:
+            client = self._get_http_client()
             response = await client.post(
-                "https://accounts.zoho.com/oauth/v2/token",
+                f"{settings.zoho_accounts_url}/oauth/v2/token",
                 data={
                     "refresh_token": self.refresh_token,
                     "client_id": self.client_id,
@@ -32,44 +139,207 @@ class ZohoClient:
                 }
             )
             
-            if response.status_code == 200:
-                data = response.json()
-                self.access_token = data["access_token"]
-                self.token_expires_at = datetime.now() + timedelta(hours=1)
-                return self.access_token
-            else:
+            data = response.json() if response.status_code == 200 else {}
+            if "access_token" not in data:
                 raise Exception(f"Failed to get access token: {response.text}")
+            
+            self.access_token = data["access_token"]
+            self.token_expires_at = datetime.now(timezone.utc) + timedelta(
+                seconds=int(data.get("expires_in", 3600))
+            )
+            self._rejected_token = None
+            self._save_cached_token()
+            logger.info(f"Refreshed Zoho access token, expires at {self.token_expires_at.isoformat()}")
+            return self.access_token
     
-    async def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict:
-        """Make authenticated request to Zoho API"""
-        token = await self._get_access_token()
-        headers = {
-            "Authorization": f"Zoho-oauthtoken {token}",
-            "orgId": self.org_id,
-            **kwargs.get("headers", {})
-        }
+    async def _make_request(self, method: str, endpoint: str,
+                            priority: bool = False, **kwargs) -> Dict:
+        """Make authenticated request to Zoho API
         
+        Every call goes through the shared rate limiter; `priority` requests
+        (webhook-driven) may dip into the reserved daily credit headroom.
+        Transient failures are retried according to the shared retry policy.
+        """
+        method = method.upper()
+        extra_headers = kwargs.pop("headers", {})
         url = f"{self.base_url}/{endpoint}"
+        client = self._get_http_client()
+        token_refreshed = False
+        attempt = 0
         
-        async with httpx.AsyncClient() as client:
-            response = await client.request(
-                method, url, headers=headers, **kwargs
-            )
+        while True:
+            await zoho_rate_limiter.acquire(priority=priority)
+            token = await self._get_access_token()
+            headers = {
+                "Authorization": f"Zoho-oauthtoken {token}",
+                "orgId": self.org_id,
+                **extra_headers
+            }
+            
+            try:
+                response = await client.request(
+                    method, url, headers=headers, **kwargs
+                )
+            except httpx.TransportError as e:
+                # Failures before the request left us are safe to replay for any method
+                request_sent = not isinstance(
+                    e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+                )
+                if (attempt < self.retry_policy.max_retries
+                        and self.retry_policy.retryable_error(method, request_sent)):
+                    delay = self.retry_policy.delay(attempt)
+                    logger.warning(f"Zoho {method} {endpoint} failed ({e!r}), "
+                                   f"retrying in {delay:.1f}s")
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+                raise
             
-            if response.status_code in [200, 201]:
+            if response.status_code == 204:
+                return {}
+            elif response.status_code in [200, 201]:
                 return response.json()
+            elif response.status_code == 401 and not token_refreshed:
+                # Token revoked or expired early: refresh once and replay
+                self._invalidate_token(token)
+                token_refreshed = True
+                continue
+            elif (attempt < self.retry_policy.max_retries
+                    and self.retry_policy.retryable_status(method, response.status_code)
+                    and self.retry_policy.retry_after_allowed(response.headers.get("Retry-After"))):
+                delay = self.retry_policy.delay(attempt, response.headers.get("Retry-After"))
+                logger.warning(f"Zoho {method} {endpoint} returned {response.status_code}, "
+                               f"retrying in {delay:.1f}s")
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
             else:
                 logger.error(f"Zoho API error: {response.status_code} - {response.text}")
-                raise Exception(f"Zoho API error: {response.status_code}")
+                raise ZohoAPIError(response.status_code, f"Zoho API error: {response.status_code}")
     
-    # FSM-specific methods
-    async def get_work_orders(self, modified_since: Optional[datetime] = None) -> List[Dict]:
-        """Get work orders from Zoho FSM"""
-        params = {}
+    async def iter_pages(self, endpoint: str, modified_since: Optional[datetime] = None,
+                         per_page: Optional[int] = None,
+                         priority: bool = False,
+                         start_page: int = 1,
+                         sort_by: Optional[str] = None,
+                         fields: Optional[str] = None) -> AsyncIterator[Tuple[int, List[Dict]]]:
+        """Yield (page number, records) from a paginated Zoho list endpoint
+        
+        Follows Zoho's page/per_page/more_records cursor from `start_page` and
+        prefetches the next page while the caller processes the current one.
+        With `sort_by`, records come back in ascending order of that field;
+        `fields` limits each record to a comma-separated list of fields.
+        """
+        params = {"per_page": per_page or settings.zoho_page_size, "page": start_page}
         if modified_since:
             params["modified_time"] = modified_since.isoformat()
+        if sort_by:
+            params["sort_by"] = sort_by
+            params["sort_order"] = "asc"
+        if fields:
+            params["fields"] = fields
+        
+        next_page = asyncio.create_task(
+            self._make_request("GET", endpoint, priority=priority, params=dict(params))
+        )
+        try:
+            while next_page is not None:
+                response = await next_page
+                next_page = None
+                # Zoho returns 204 / an empty body when there are no records
+                if not response:
+                    return
+                
+                # Prefetch the following page before handing this one out
+                page_number = params["page"]
+                info = response.get("info", {})
+                if info.get("more_records"):
+                    params["page"] = info.get("page", page_number) + 1
+                    next_page = asyncio.create_task(
+                        self._make_request("GET", endpoint, priority=priority, params=dict(params))
+                    )
+                
+                yield page_number, response.get("data", [])
+        finally:
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+    
+    async def iter_records(self, endpoint: str, modified_since: Optional[datetime] = None,
+                           per_page: Optional[int] = None,
+                           priority: bool = False) -> AsyncIterator[Dict]:
+        """Yield records from a paginated Zoho list endpoint, one page at a time"""
+        async for _, page in self.iter_pages(endpoint, modified_since, per_page, priority):
+            for record in page:
+                yield record
+    
+    async def get_record(self, table: str, record_id: str, priority: bool = False) -> Optional[Dict]:
+        """Get a single FSM record by ID, or None if Zoho has no such record"""
+        try:
+            response = await self._make_request(
+                "GET", f"{self.ENTITY_ENDPOINTS[table]}/{record_id}", priority=priority
+            )
+        except ZohoAPIError as e:
+            if e.status_code == 404:
+                return None
+            raise
+        data = response.get("data") if response else None
+        if isinstance(data, list):
+            return data[0] if data else None
+        return data
+    
+    async def get_oldest_record(self, table: str) -> Optional[Dict]:
+        """Get the least recently modified FSM record, or None if there are none"""
+        response = await self._make_request(
+            "GET", self.ENTITY_ENDPOINTS[table],
+            params={"per_page": 1, "page": 1, "sort_by": "Modified_Time", "sort_order": "asc"}
+        )
+        data = response.get("data") if response else None
+        return data[0] if data else None
+    
+    async def _bulk_write(self, method: str, table: str, records: List[Dict]) -> List[Dict]:
+        """Send records to Zoho in multi-record `data` payloads
+        
+        Returns one result per input record, in order. A chunk that fails as a
+        whole yields an error result for each of its records.
+        """
+        results = []
+        size = settings.zoho_bulk_write_size
+        for start in range(0, len(records), size):
+            chunk = records[start:start + size]
+            try:
+                response = await self._make_request(
+                    method, self.ENTITY_ENDPOINTS[table], json={"data": chunk}
+                )
+                chunk_results = response.get("data", []) if response else []
+            except Exception as e:
+                chunk_results = []
+                error = str(e)
+            else:
+                error = "No result returned by Zoho"
             
-        return await self._make_request("GET", "fsm/v1/workorders", params=params)
+            for index in range(len(chunk)):
+                if index < len(chunk_results):
+                    results.append(chunk_results[index])
+                else:
+                    results.append({"status": "error", "message": error})
+        return results
+    
+    async def bulk_create(self, table: str, records: List[Dict]) -> List[Dict]:
+        """Create FSM records in bulk, returning Zoho's per-record results"""
+        return await self._bulk_write("POST", table, records)
+    
+    async def bulk_update(self, table: str, records: List[Dict]) -> List[Dict]:
+        """Update FSM records (each carrying its Zoho `id`) in bulk"""
+        return await self._bulk_write("PUT", table, records)
+    
+    # FSM-specific methods
+    def iter_work_orders(self, modified_since: Optional[datetime] = None) -> AsyncIterator[Dict]:
+        """Stream work orders from Zoho FSM page by page"""
+        return self.iter_records("fsm/v1/workorders", modified_since)
+    
+    async def get_work_orders(self, modified_since: Optional[datetime] = None) -> List[Dict]:
+        """Get all work orders from Zoho FSM"""
+        return [record async for record in self.iter_work_orders(modified_since)]
     
     async def create_work_order(self, data: Dict) -> Dict:
         """Create work order in Zoho FSM"""
@@ -79,13 +349,13 @@ class ZohoClient:
         """Update work order in Zoho FSM"""
         return await self._make_request("PUT", f"fsm/v1/workorders/{work_order_id}", json=data)
     
+    def iter_customers(self, modified_since: Optional[datetime] = None) -> AsyncIterator[Dict]:
+        """Stream customers from Zoho FSM page by page"""
+        return self.iter_records("fsm/v1/customers", modified_since)
+    
     async def get_customers(self, modified_since: Optional[datetime] = None) -> List[Dict]:
-        """Get customers from Zoho FSM"""
-        params = {}
-        if modified_since:
-            params["modified_time"] = modified_since.isoformat()
-            
-        return await self._make_request("GET", "fsm/v1/customers", params=params)
+        """Get all customers from Zoho FSM"""
+        return [record async for record in self.iter_customers(modified_since)]
     
     async def create_customer(self, data: Dict) -> Dict:
         """Create customer in Zoho FSM"""
@@ -95,13 +365,13 @@ class ZohoClient:
         """Update customer in Zoho FSM"""
         return await self._make_request("PUT", f"fsm/v1/customers/{customer_id}", json=data)
     
+    def iter_technicians(self, modified_since: Optional[datetime] = None) -> AsyncIterator[Dict]:
+        """Stream technicians from Zoho FSM page by page"""
+        return self.iter_records("fsm/v1/technicians", modified_since)
+    
     async def get_technicians(self, modified_since: Optional[datetime] = None) -> List[Dict]:
-        """Get technicians from Zoho FSM"""
-        params = {}
-        if modified_since:
-            params["modified_time"] = modified_since.isoformat()
-            
-        return await self._make_request("GET", "fsm/v1/technicians", params=params)
+        """Get all technicians from Zoho FSM"""
+        return [record async for record in self.iter_technicians(modified_since)]
     
     async def create_technician(self, data: Dict) -> Dict:
         """Create technician in Zoho FSM"""
@@ -111,13 +381,13 @@ class ZohoClient:
         """Update technician in Zoho FSM"""
         return await self._make_request("PUT", f"fsm/v1/technicians/{technician_id}", json=data)
     
+    def iter_appointments(self, modified_since: Optional[datetime] = None) -> AsyncIterator[Dict]:
+        """Stream appointments from Zoho FSM page by page"""
+        return self.iter_records("fsm/v1/appointments", modified_since)
+    
     async def get_appointments(self, modified_since: Optional[datetime] = None) -> List[Dict]:
-        """Get appointments from Zoho FSM"""
-        params = {}
-        if modified_since:
-            params["modified_time"] = modified_since.isoformat()
-            
-        return await self._make_request("GET", "fsm/v1/appointments", params=params)
+        """Get all appointments from Zoho FSM"""
+        return [record async for record in self.iter_appointments(modified_since)]
     
     async def create_appointment(self, data: Dict) -> Dict:
         """Create appointment in Zoho FSM"""
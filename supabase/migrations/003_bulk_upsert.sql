@@ -0,0 +1,58 @@
+-- Set-based bulk upsert for sync writes
+-- Migration: 003_bulk_upsert.sql
+
+-- Function to upsert a JSONB array of records into any schema.table in one statement
+CREATE OR REPLACE FUNCTION upsert_records(
+    p_schema TEXT,
+    p_table TEXT,
+    p_rows JSONB,
+    p_unique_field TEXT DEFAULT 'id'
+)
+RETURNS INTEGER AS $$
+DECLARE
+    sql_query TEXT;
+    columns_list TEXT;
+    update_list TEXT;
+    affected_rows INTEGER;
+BEGIN
+    IF p_rows IS NULL OR jsonb_array_length(p_rows) = 0 THEN
+        RETURN 0;
+    END IF;
+    
+    -- Only write columns that exist on the table and appear in the payload
+    SELECT
+        string_agg(quote_ident(c.column_name), ',' ORDER BY c.ordinal_position),
+        string_agg(quote_ident(c.column_name) || ' = EXCLUDED.' || quote_ident(c.column_name), ','
+                   ORDER BY c.ordinal_position)
+            FILTER (WHERE c.column_name NOT IN (p_unique_field, 'updated_at'))
+    INTO columns_list, update_list
+    FROM information_schema.columns c
+    WHERE c.table_schema = p_schema
+      AND c.table_name = p_table
+      AND EXISTS (
+          SELECT 1 FROM jsonb_array_elements(p_rows) AS r(row_data)
+          WHERE r.row_data ? c.column_name
+      );
+    
+    IF columns_list IS NULL THEN
+        RAISE EXCEPTION 'No matching columns for %.%', p_schema, p_table;
+    END IF;
+    
+    sql_query := format(
+        'INSERT INTO %I.%I (%s)
+         SELECT %s FROM jsonb_populate_recordset(NULL::%I.%I, $1)
+         ON CONFLICT (%I) DO UPDATE SET %s',
+        p_schema, p_table, columns_list,
+        columns_list, p_schema, p_table,
+        p_unique_field,
+        COALESCE(update_list || ', ', '') || 'updated_at = NOW()'
+    );
+    
+    EXECUTE sql_query USING p_rows;
+    GET DIAGNOSTICS affected_rows = ROW_COUNT;
+    RETURN affected_rows;
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in upsert_records: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
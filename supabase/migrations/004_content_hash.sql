@@ -0,0 +1,39 @@
+-- Content-hash change detection for synced tables
+-- Migration: 004_content_hash.sql
+
+-- Add a content_hash column to every synced FSM table that exists
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['work_orders', 'customers', 'technicians', 'appointments', 'service_appointments']
+    LOOP
+        IF to_regclass(format('zoho_fsm.%I', t)) IS NOT NULL THEN
+            EXECUTE format('ALTER TABLE zoho_fsm.%I ADD COLUMN IF NOT EXISTS content_hash TEXT', t);
+        END IF;
+    END LOOP;
+END;
+$$;
+
+-- Function to load the id -> content_hash index for any schema.table
+CREATE OR REPLACE FUNCTION get_content_hashes(
+    p_schema TEXT,
+    p_table TEXT
+)
+RETURNS JSONB AS $$
+DECLARE
+    sql_query TEXT;
+    result JSONB;
+BEGIN
+    sql_query := format(
+        'SELECT jsonb_object_agg(id::text, content_hash) FROM %I.%I WHERE content_hash IS NOT NULL',
+        p_schema, p_table
+    );
+    
+    EXECUTE sql_query INTO result;
+    RETURN COALESCE(result, '{}'::jsonb);
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in get_content_hashes: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,55 @@
+-- Keyset pagination for reads from synced tables
+-- Migration: 005_paginated_reads.sql
+
+-- Function to get one page of records from any schema.table, ordered by id
+CREATE OR REPLACE FUNCTION get_records_page(
+    p_schema TEXT,
+    p_table TEXT,
+    p_filters JSONB DEFAULT NULL,
+    p_after TEXT DEFAULT NULL,
+    p_limit INTEGER DEFAULT 100,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS JSONB AS $$
+DECLARE
+    sql_query TEXT;
+    where_clause TEXT := '';
+    conditions TEXT[] := ARRAY[]::TEXT[];
+    id_type TEXT;
+    result JSONB;
+BEGIN
+    -- Build WHERE clause from filters
+    IF p_filters IS NOT NULL THEN
+        SELECT array_agg(quote_ident(key) || ' = ' || quote_literal(value #>> '{}'))
+        INTO conditions
+        FROM jsonb_each(p_filters);
+    END IF;
+    
+    -- Keyset cursor: compare in the id column's own type so numeric ids sort correctly
+    IF p_after IS NOT NULL THEN
+        SELECT format_type(a.atttypid, a.atttypmod) INTO id_type
+        FROM pg_attribute a
+        WHERE a.attrelid = to_regclass(format('%I.%I', p_schema, p_table))
+          AND a.attname = 'id'
+          AND NOT a.attisdropped;
+        
+        conditions := conditions || format('id > %L::%s', p_after, id_type);
+    END IF;
+    
+    IF array_length(conditions, 1) > 0 THEN
+        where_clause := ' WHERE ' || array_to_string(conditions, ' AND ');
+    END IF;
+    
+    sql_query := format(
+        'SELECT jsonb_agg(to_jsonb(t.*) ORDER BY t.id)
+         FROM (SELECT * FROM %I.%I%s ORDER BY id LIMIT %s OFFSET %s) t',
+        p_schema, p_table, where_clause, p_limit, p_offset
+    );
+    
+    EXECUTE sql_query INTO result;
+    RETURN COALESCE(result, '[]'::jsonb);
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in get_records_page: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
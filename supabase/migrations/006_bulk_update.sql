@@ -0,0 +1,54 @@
+-- Set-based bulk update for sync bookkeeping
+-- Migration: 006_bulk_update.sql
+
+-- Function to update existing rows of any schema.table from a JSONB array,
+-- touching only the columns present in the payload (rows should share keys;
+-- a key missing from one row sets that column to NULL for it)
+CREATE OR REPLACE FUNCTION update_records(
+    p_schema TEXT,
+    p_table TEXT,
+    p_rows JSONB,
+    p_unique_field TEXT DEFAULT 'id'
+)
+RETURNS INTEGER AS $$
+DECLARE
+    sql_query TEXT;
+    update_list TEXT;
+    affected_rows INTEGER;
+BEGIN
+    IF p_rows IS NULL OR jsonb_array_length(p_rows) = 0 THEN
+        RETURN 0;
+    END IF;
+    
+    SELECT string_agg(quote_ident(c.column_name) || ' = src.' || quote_ident(c.column_name), ',')
+    INTO update_list
+    FROM information_schema.columns c
+    WHERE c.table_schema = p_schema
+      AND c.table_name = p_table
+      AND c.column_name NOT IN (p_unique_field, 'updated_at')
+      AND EXISTS (
+          SELECT 1 FROM jsonb_array_elements(p_rows) AS r(row_data)
+          WHERE r.row_data ? c.column_name
+      );
+    
+    IF update_list IS NULL THEN
+        RETURN 0;
+    END IF;
+    
+    sql_query := format(
+        'UPDATE %I.%I AS dst SET %s, updated_at = NOW()
+         FROM jsonb_populate_recordset(NULL::%I.%I, $1) AS src
+         WHERE dst.%I = src.%I',
+        p_schema, p_table, update_list,
+        p_schema, p_table,
+        p_unique_field, p_unique_field
+    );
+    
+    EXECUTE sql_query USING p_rows;
+    GET DIAGNOSTICS affected_rows = ROW_COUNT;
+    RETURN affected_rows;
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in update_records: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
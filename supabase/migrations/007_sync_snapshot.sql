@@ -0,0 +1,16 @@
+-- Last-synced snapshot for field-level outbound diffs
+-- Migration: 007_sync_snapshot.sql
+
+-- Add a synced_snapshot column (Zoho fields as last agreed with Zoho) to every synced FSM table
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['work_orders', 'customers', 'technicians', 'appointments', 'service_appointments']
+    LOOP
+        IF to_regclass(format('zoho_fsm.%I', t)) IS NOT NULL THEN
+            EXECUTE format('ALTER TABLE zoho_fsm.%I ADD COLUMN IF NOT EXISTS synced_snapshot JSONB', t);
+        END IF;
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,154 @@
+-- Trigger-fed outbox for Supabase -> Zoho change capture
+-- Migration: 008_outbox.sql
+
+-- Add the reverse-sync bookkeeping columns to every synced FSM table that
+-- exists; tables created by 002_create_fsm_tables.sql don't have them
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['work_orders', 'customers', 'technicians', 'appointments', 'service_appointments']
+    LOOP
+        IF to_regclass(format('zoho_fsm.%I', t)) IS NOT NULL THEN
+            EXECUTE format('ALTER TABLE zoho_fsm.%I ADD COLUMN IF NOT EXISTS source VARCHAR(20) DEFAULT %L', t, 'zoho');
+            EXECUTE format('ALTER TABLE zoho_fsm.%I ADD COLUMN IF NOT EXISTS sync_status VARCHAR(20) DEFAULT %L', t, 'synced');
+            EXECUTE format('ALTER TABLE zoho_fsm.%I ADD COLUMN IF NOT EXISTS error_message TEXT', t);
+        END IF;
+    END LOOP;
+END;
+$$;
+
+-- One unprocessed entry per changed record; version bumps on every change
+CREATE SEQUENCE IF NOT EXISTS sync_outbox_version_seq;
+
+CREATE TABLE IF NOT EXISTS sync_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    schema_name VARCHAR(100) NOT NULL,
+    table_name VARCHAR(100) NOT NULL,
+    record_id TEXT NOT NULL,
+    version BIGINT NOT NULL DEFAULT nextval('sync_outbox_version_seq'),
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    processed_at TIMESTAMPTZ
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sync_outbox_unprocessed
+    ON sync_outbox (schema_name, table_name, record_id)
+    WHERE processed_at IS NULL;
+
+-- Trigger function: enqueue rows edited in Supabase and wake the listener
+CREATE OR REPLACE FUNCTION enqueue_outbound_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.sync_status = 'pending' AND NEW.source = 'supabase' THEN
+        INSERT INTO sync_outbox (schema_name, table_name, record_id)
+        VALUES (TG_TABLE_SCHEMA, TG_TABLE_NAME, NEW.id::text)
+        ON CONFLICT (schema_name, table_name, record_id) WHERE processed_at IS NULL
+        DO UPDATE SET version = nextval('sync_outbox_version_seq');
+
+        PERFORM pg_notify('sync_outbox', TG_TABLE_SCHEMA || '.' || TG_TABLE_NAME);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Attach the trigger to every reverse-synced table and backfill pending rows
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['work_orders', 'customers', 'technicians']
+    LOOP
+        IF to_regclass(format('zoho_fsm.%I', t)) IS NOT NULL THEN
+            EXECUTE format('DROP TRIGGER IF EXISTS enqueue_outbound_%s ON zoho_fsm.%I', t, t);
+            EXECUTE format(
+                'CREATE TRIGGER enqueue_outbound_%s AFTER INSERT OR UPDATE ON zoho_fsm.%I
+                 FOR EACH ROW EXECUTE FUNCTION enqueue_outbound_change()', t, t
+            );
+            EXECUTE format(
+                'INSERT INTO sync_outbox (schema_name, table_name, record_id)
+                 SELECT %L, %L, id::text FROM zoho_fsm.%I
+                 WHERE sync_status = %L AND source = %L
+                 ON CONFLICT (schema_name, table_name, record_id) WHERE processed_at IS NULL
+                 DO NOTHING',
+                'zoho_fsm', t, t, 'pending', 'supabase'
+            );
+        END IF;
+    END LOOP;
+END;
+$$;
+
+-- Function to claim outbound rows for one schema.table
+-- Returns {"rows": [...], "versions": {record_id: version}}; entries whose row
+-- is no longer pending are closed here.
+CREATE OR REPLACE FUNCTION claim_outbox(
+    p_schema TEXT,
+    p_table TEXT,
+    p_limit INTEGER DEFAULT 100
+)
+RETURNS JSONB AS $$
+DECLARE
+    sql_query TEXT;
+    result JSONB;
+BEGIN
+    sql_query := format(
+        'UPDATE sync_outbox o SET processed_at = NOW()
+         WHERE o.schema_name = %L AND o.table_name = %L AND o.processed_at IS NULL
+           AND NOT EXISTS (
+               SELECT 1 FROM %I.%I t
+               WHERE t.id::text = o.record_id
+                 AND t.sync_status = %L AND t.source = %L
+           )',
+        p_schema, p_table, p_schema, p_table, 'pending', 'supabase'
+    );
+    EXECUTE sql_query;
+
+    sql_query := format(
+        'SELECT jsonb_build_object(
+             %L, COALESCE(jsonb_agg(to_jsonb(t.*)), %L::jsonb),
+             %L, COALESCE(jsonb_object_agg(o.record_id, o.version), %L::jsonb)
+         )
+         FROM (SELECT record_id, version FROM sync_outbox
+               WHERE schema_name = %L AND table_name = %L AND processed_at IS NULL
+               ORDER BY version LIMIT %s) o
+         JOIN %I.%I t ON t.id::text = o.record_id',
+        'rows', '[]', 'versions', '{}',
+        p_schema, p_table, p_limit,
+        p_schema, p_table
+    );
+    EXECUTE sql_query INTO result;
+    RETURN result;
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in claim_outbox: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to close outbox entries once pushed; entries changed again since
+-- the claim (higher version) stay open
+CREATE OR REPLACE FUNCTION ack_outbox(
+    p_schema TEXT,
+    p_table TEXT,
+    p_versions JSONB
+)
+RETURNS INTEGER AS $$
+DECLARE
+    affected_rows INTEGER;
+BEGIN
+    UPDATE sync_outbox o SET processed_at = NOW()
+    FROM jsonb_each_text(p_versions) AS v(record_id, version)
+    WHERE o.schema_name = p_schema
+      AND o.table_name = p_table
+      AND o.processed_at IS NULL
+      AND o.record_id = v.record_id
+      AND o.version <= v.version::bigint;
+
+    GET DIAGNOSTICS affected_rows = ROW_COUNT;
+    RETURN affected_rows;
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in ack_outbox: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Processed entries are only useful for auditing; prune them periodically, e.g.
+-- DELETE FROM sync_outbox WHERE processed_at < NOW() - INTERVAL '7 days';
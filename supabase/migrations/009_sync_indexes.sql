@@ -0,0 +1,121 @@
+-- Indexes and query fixes for the sync hot paths
+-- Migration: 009_sync_indexes.sql
+
+-- Partial index for the pending outbound scan and (modified_time, id) for incremental reads
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['work_orders', 'customers', 'technicians', 'appointments', 'service_appointments']
+    LOOP
+        IF to_regclass(format('zoho_fsm.%I', t)) IS NULL THEN
+            CONTINUE;
+        END IF;
+
+        EXECUTE format(
+            'CREATE INDEX IF NOT EXISTS %I ON zoho_fsm.%I (id)
+             WHERE sync_status = %L AND source = %L',
+            'idx_' || t || '_pending_outbound', t, 'pending', 'supabase'
+        );
+
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = 'zoho_fsm' AND table_name = t AND column_name = 'modified_time'
+        ) THEN
+            EXECUTE format(
+                'CREATE INDEX IF NOT EXISTS %I ON zoho_fsm.%I (modified_time, id)',
+                'idx_' || t || '_modified_time_id', t
+            );
+        END IF;
+    END LOOP;
+END;
+$$;
+
+-- get_records compared filters against the JSON text of each value ('"pending"'),
+-- which never matched string columns and kept the planner off partial indexes.
+-- Compare against the plain text value instead.
+CREATE OR REPLACE FUNCTION get_records(
+    p_schema TEXT,
+    p_table TEXT,
+    p_filters JSONB DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+    sql_query TEXT;
+    where_clause TEXT := '';
+    result JSONB;
+BEGIN
+    -- Build WHERE clause from filters
+    IF p_filters IS NOT NULL THEN
+        SELECT string_agg(quote_ident(key) || ' = ' || quote_literal(value #>> '{}'), ' AND ')
+        INTO where_clause
+        FROM jsonb_each(p_filters);
+
+        where_clause := ' WHERE ' || where_clause;
+    END IF;
+
+    -- Build dynamic SQL
+    sql_query := format(
+        'SELECT to_jsonb(array_agg(%I.*)) FROM %I.%I%s',
+        p_table, p_schema, p_table, where_clause
+    );
+
+    EXECUTE sql_query INTO result;
+    RETURN COALESCE(result, '[]'::jsonb);
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in get_records: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
+
+-- claim_outbox joined on id::text, which can't use the primary key of
+-- BIGSERIAL tables. Cast the outbox record_id to the id column's type instead.
+CREATE OR REPLACE FUNCTION claim_outbox(
+    p_schema TEXT,
+    p_table TEXT,
+    p_limit INTEGER DEFAULT 100
+)
+RETURNS JSONB AS $$
+DECLARE
+    sql_query TEXT;
+    id_type TEXT;
+    result JSONB;
+BEGIN
+    SELECT format_type(a.atttypid, a.atttypmod) INTO id_type
+    FROM pg_attribute a
+    WHERE a.attrelid = to_regclass(format('%I.%I', p_schema, p_table))
+      AND a.attname = 'id'
+      AND NOT a.attisdropped;
+
+    sql_query := format(
+        'UPDATE sync_outbox o SET processed_at = NOW()
+         WHERE o.schema_name = %L AND o.table_name = %L AND o.processed_at IS NULL
+           AND NOT EXISTS (
+               SELECT 1 FROM %I.%I t
+               WHERE t.id = o.record_id::%s
+                 AND t.sync_status = %L AND t.source = %L
+           )',
+        p_schema, p_table, p_schema, p_table, id_type, 'pending', 'supabase'
+    );
+    EXECUTE sql_query;
+
+    sql_query := format(
+        'SELECT jsonb_build_object(
+             %L, COALESCE(jsonb_agg(to_jsonb(t.*)), %L::jsonb),
+             %L, COALESCE(jsonb_object_agg(o.record_id, o.version), %L::jsonb)
+         )
+         FROM (SELECT record_id, version FROM sync_outbox
+               WHERE schema_name = %L AND table_name = %L AND processed_at IS NULL
+               ORDER BY version LIMIT %s) o
+         JOIN %I.%I t ON t.id = o.record_id::%s',
+        'rows', '[]', 'versions', '{}',
+        p_schema, p_table, p_limit,
+        p_schema, p_table, id_type
+    );
+    EXECUTE sql_query INTO result;
+    RETURN result;
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in claim_outbox: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,18 @@
+-- Single-call sync status overview
+-- Migration: 010_sync_status_overview.sql
+
+-- Function to get every sync status row at once, keyed by "schema.table"
+CREATE OR REPLACE FUNCTION get_all_sync_status()
+RETURNS JSONB AS $$
+DECLARE
+    result JSONB;
+BEGIN
+    SELECT jsonb_object_agg(s.table_name, to_jsonb(s.*)) INTO result
+    FROM sync_status s;
+    
+    RETURN COALESCE(result, '{}'::jsonb);
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in get_all_sync_status: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql STABLE;
@@ -0,0 +1,60 @@
+-- Checkpoints for resumable backfills
+-- Migration: 011_sync_checkpoints.sql
+
+-- One row per "schema.table" backfill; next_page is the first Zoho page not yet fully written
+CREATE TABLE IF NOT EXISTS sync_checkpoints (
+    table_name VARCHAR(100) PRIMARY KEY,
+    status VARCHAR(50) NOT NULL DEFAULT 'running', -- running, complete
+    next_page INTEGER NOT NULL DEFAULT 1,
+    records_written BIGINT NOT NULL DEFAULT 0,
+    started_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Function to get every checkpoint keyed by "schema.table"
+CREATE OR REPLACE FUNCTION get_sync_checkpoints()
+RETURNS JSONB AS $$
+DECLARE
+    result JSONB;
+BEGIN
+    SELECT jsonb_object_agg(c.table_name, to_jsonb(c.*)) INTO result
+    FROM sync_checkpoints c;
+
+    RETURN COALESCE(result, '{}'::jsonb);
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in get_sync_checkpoints: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Function to save a checkpoint; p_started_at is only used when starting a new backfill
+CREATE OR REPLACE FUNCTION save_sync_checkpoint(
+    p_schema TEXT,
+    p_table TEXT,
+    p_status TEXT,
+    p_next_page INTEGER,
+    p_records_written BIGINT,
+    p_started_at TEXT DEFAULT NULL
+)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO sync_checkpoints (table_name, status, next_page, records_written, started_at, updated_at)
+    VALUES (
+        p_schema || '.' || p_table, p_status, p_next_page, p_records_written,
+        COALESCE(p_started_at::timestamptz, NOW()), NOW()
+    )
+    ON CONFLICT (table_name)
+    DO UPDATE SET
+        status = EXCLUDED.status,
+        next_page = EXCLUDED.next_page,
+        records_written = EXCLUDED.records_written,
+        started_at = CASE WHEN p_started_at IS NULL
+                          THEN sync_checkpoints.started_at
+                          ELSE EXCLUDED.started_at END,
+        updated_at = NOW();
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in save_sync_checkpoint: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
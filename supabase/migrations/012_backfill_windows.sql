@@ -0,0 +1,41 @@
+-- Time-window sharded backfills
+-- Migration: 012_backfill_windows.sql
+
+-- A backfill now covers a list of Modified_Time windows, each with its own
+-- status and Modified_Time cursor, instead of one page cursor over the whole entity:
+-- [{"start": ..., "end": ..., "status": "pending" | "complete", "cursor": null}, ...]
+ALTER TABLE sync_checkpoints ADD COLUMN IF NOT EXISTS windows JSONB NOT NULL DEFAULT '[]'::jsonb;
+ALTER TABLE sync_checkpoints DROP COLUMN IF EXISTS next_page;
+
+DROP FUNCTION IF EXISTS save_sync_checkpoint(TEXT, TEXT, TEXT, INTEGER, BIGINT, TEXT);
+
+-- Function to save a checkpoint; p_started_at is only used when starting a new backfill
+CREATE OR REPLACE FUNCTION save_sync_checkpoint(
+    p_schema TEXT,
+    p_table TEXT,
+    p_status TEXT,
+    p_windows JSONB,
+    p_records_written BIGINT,
+    p_started_at TEXT DEFAULT NULL
+)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO sync_checkpoints (table_name, status, windows, records_written, started_at, updated_at)
+    VALUES (
+        p_schema || '.' || p_table, p_status, p_windows, p_records_written,
+        COALESCE(p_started_at::timestamptz, NOW()), NOW()
+    )
+    ON CONFLICT (table_name)
+    DO UPDATE SET
+        status = EXCLUDED.status,
+        windows = EXCLUDED.windows,
+        records_written = EXCLUDED.records_written,
+        started_at = CASE WHEN p_started_at IS NULL
+                          THEN sync_checkpoints.started_at
+                          ELSE EXCLUDED.started_at END,
+        updated_at = NOW();
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in save_sync_checkpoint: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,111 @@
+-- Soft deletes for records removed in Zoho
+-- Migration: 013_soft_delete.sql
+
+-- Add a deleted_at column to every synced FSM table that exists
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['work_orders', 'customers', 'technicians', 'appointments', 'service_appointments']
+    LOOP
+        IF to_regclass(format('zoho_fsm.%I', t)) IS NOT NULL THEN
+            EXECUTE format('ALTER TABLE zoho_fsm.%I ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ', t);
+        END IF;
+    END LOOP;
+END;
+$$;
+
+-- Function to get one page of zoho_ids from any schema.table, ordered by id
+-- Returns [{"id", "zoho_id", "deleted"}, ...]; rows created at or after p_before are
+-- left out, since a listing of Zoho taken at p_before can't know about them yet.
+CREATE OR REPLACE FUNCTION get_zoho_ids_page(
+    p_schema TEXT,
+    p_table TEXT,
+    p_after TEXT DEFAULT NULL,
+    p_limit INTEGER DEFAULT 5000,
+    p_before TEXT DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+    sql_query TEXT;
+    conditions TEXT[] := ARRAY['zoho_id IS NOT NULL'];
+    id_type TEXT;
+    result JSONB;
+BEGIN
+    -- Keyset cursor: compare in the id column's own type so numeric ids sort correctly
+    IF p_after IS NOT NULL THEN
+        SELECT format_type(a.atttypid, a.atttypmod) INTO id_type
+        FROM pg_attribute a
+        WHERE a.attrelid = to_regclass(format('%I.%I', p_schema, p_table))
+          AND a.attname = 'id'
+          AND NOT a.attisdropped;
+
+        conditions := conditions || format('id > %L::%s', p_after, id_type);
+    END IF;
+
+    IF p_before IS NOT NULL THEN
+        conditions := conditions || format('created_at < %L::timestamptz', p_before);
+    END IF;
+
+    sql_query := format(
+        'SELECT jsonb_agg(jsonb_build_object(%L, t.id, %L, t.zoho_id, %L, t.deleted_at IS NOT NULL) ORDER BY t.id)
+         FROM (SELECT id, zoho_id, deleted_at FROM %I.%I WHERE %s ORDER BY id LIMIT %s) t',
+        'id', 'zoho_id', 'deleted',
+        p_schema, p_table, array_to_string(conditions, ' AND '), p_limit
+    );
+
+    EXECUTE sql_query INTO result;
+    RETURN COALESCE(result, '[]'::jsonb);
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in get_zoho_ids_page: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to soft-delete (or restore) records of any schema.table by zoho_id
+-- Deleting also clears content_hash, so a record that reappears in Zoho is
+-- written again rather than skipped as unchanged. Returns the affected ids.
+CREATE OR REPLACE FUNCTION set_records_deleted(
+    p_schema TEXT,
+    p_table TEXT,
+    p_zoho_ids JSONB,
+    p_deleted BOOLEAN DEFAULT TRUE
+)
+RETURNS JSONB AS $$
+DECLARE
+    sql_query TEXT;
+    result JSONB;
+BEGIN
+    IF p_zoho_ids IS NULL OR jsonb_array_length(p_zoho_ids) = 0 THEN
+        RETURN '[]'::jsonb;
+    END IF;
+
+    IF p_deleted THEN
+        sql_query := format(
+            'WITH affected AS (
+                 UPDATE %I.%I SET deleted_at = NOW(), content_hash = NULL, updated_at = NOW()
+                 WHERE zoho_id IN (SELECT jsonb_array_elements_text($1)) AND deleted_at IS NULL
+                 RETURNING id
+             )
+             SELECT jsonb_agg(id::text) FROM affected',
+            p_schema, p_table
+        );
+    ELSE
+        sql_query := format(
+            'WITH affected AS (
+                 UPDATE %I.%I SET deleted_at = NULL, updated_at = NOW()
+                 WHERE zoho_id IN (SELECT jsonb_array_elements_text($1)) AND deleted_at IS NOT NULL
+                 RETURNING id
+             )
+             SELECT jsonb_agg(id::text) FROM affected',
+            p_schema, p_table
+        );
+    END IF;
+
+    EXECUTE sql_query INTO result USING p_zoho_ids;
+    RETURN COALESCE(result, '[]'::jsonb);
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in set_records_deleted: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,47 @@
+-- Bucketed checksums for integrity checks against Zoho
+-- Migration: 014_bucket_digests.sql
+
+-- Function to digest the live rows of any schema.table in Modified_Time buckets
+-- Rows are grouped by floor(epoch / p_bucket_seconds) of the Modified_Time in their
+-- synced snapshot. Each bucket's digest XORs the first 64 bits of
+-- md5(zoho_id || '|' || epoch) over its rows, so it is order-independent and
+-- matches the digest SyncManager computes from a Zoho ID listing.
+-- Returns {bucket: {"count": n, "digest": d}}; rows modified at or after
+-- p_before_epoch are left out.
+CREATE OR REPLACE FUNCTION get_bucket_digests(
+    p_schema TEXT,
+    p_table TEXT,
+    p_bucket_seconds INTEGER,
+    p_before_epoch BIGINT
+)
+RETURNS JSONB AS $$
+DECLARE
+    sql_query TEXT;
+    result JSONB;
+BEGIN
+    sql_query := format(
+        'SELECT jsonb_object_agg(b.bucket::text, jsonb_build_object(%L, b.n, %L, b.digest))
+         FROM (
+             SELECT floor(r.epoch / %s)::bigint AS bucket,
+                    count(*) AS n,
+                    bit_xor((%L || substr(md5(r.zoho_id || %L || r.epoch::text), 1, 16))::bit(64)::bigint) AS digest
+             FROM (
+                 SELECT zoho_id::text AS zoho_id,
+                        COALESCE(floor(extract(epoch FROM (synced_snapshot->>%L)::timestamptz))::bigint, 0) AS epoch
+                 FROM %I.%I
+                 WHERE zoho_id IS NOT NULL AND deleted_at IS NULL
+             ) r
+             WHERE r.epoch < %s
+             GROUP BY 1
+         ) b',
+        'count', 'digest', p_bucket_seconds, 'x', '|', 'Modified_Time',
+        p_schema, p_table, p_before_epoch
+    );
+
+    EXECUTE sql_query INTO result;
+    RETURN COALESCE(result, '{}'::jsonb);
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in get_bucket_digests: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql STABLE;
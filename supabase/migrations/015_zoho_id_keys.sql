@@ -0,0 +1,73 @@
+-- Key forward-sync bookkeeping on zoho_id instead of the local id
+-- Migration: 015_zoho_id_keys.sql
+
+-- Rows created in Supabase keep their local serial id after being pushed to
+-- Zoho, so the hash index must be keyed on zoho_id to match Zoho records.
+CREATE OR REPLACE FUNCTION get_content_hashes(
+    p_schema TEXT,
+    p_table TEXT
+)
+RETURNS JSONB AS $$
+DECLARE
+    sql_query TEXT;
+    result JSONB;
+BEGIN
+    sql_query := format(
+        'SELECT jsonb_object_agg(zoho_id::text, content_hash) FROM %I.%I
+         WHERE content_hash IS NOT NULL AND zoho_id IS NOT NULL',
+        p_schema, p_table
+    );
+    
+    EXECUTE sql_query INTO result;
+    RETURN COALESCE(result, '{}'::jsonb);
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in get_content_hashes: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
+
+-- set_records_deleted now returns the affected zoho_ids, which key the hash index
+CREATE OR REPLACE FUNCTION set_records_deleted(
+    p_schema TEXT,
+    p_table TEXT,
+    p_zoho_ids JSONB,
+    p_deleted BOOLEAN DEFAULT TRUE
+)
+RETURNS JSONB AS $$
+DECLARE
+    sql_query TEXT;
+    result JSONB;
+BEGIN
+    IF p_zoho_ids IS NULL OR jsonb_array_length(p_zoho_ids) = 0 THEN
+        RETURN '[]'::jsonb;
+    END IF;
+
+    IF p_deleted THEN
+        sql_query := format(
+            'WITH affected AS (
+                 UPDATE %I.%I SET deleted_at = NOW(), content_hash = NULL, updated_at = NOW()
+                 WHERE zoho_id IN (SELECT jsonb_array_elements_text($1)) AND deleted_at IS NULL
+                 RETURNING zoho_id
+             )
+             SELECT jsonb_agg(zoho_id::text) FROM affected',
+            p_schema, p_table
+        );
+    ELSE
+        sql_query := format(
+            'WITH affected AS (
+                 UPDATE %I.%I SET deleted_at = NULL, updated_at = NOW()
+                 WHERE zoho_id IN (SELECT jsonb_array_elements_text($1)) AND deleted_at IS NOT NULL
+                 RETURNING zoho_id
+             )
+             SELECT jsonb_agg(zoho_id::text) FROM affected',
+            p_schema, p_table
+        );
+    END IF;
+
+    EXECUTE sql_query INTO result USING p_zoho_ids;
+    RETURN COALESCE(result, '[]'::jsonb);
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in set_records_deleted: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
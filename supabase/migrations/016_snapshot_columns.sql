@@ -0,0 +1,72 @@
+-- Store synced snapshots in table-column form
+-- Migration: 016_snapshot_columns.sql
+
+-- Forward sync used to store snapshots under Zoho's field API names
+-- ("Modified_Time") while reverse sync stored column names ("modified_time").
+-- Both now use column names, which are the API names lowercased; convert
+-- existing snapshots to match.
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['work_orders', 'customers', 'technicians', 'appointments', 'service_appointments']
+    LOOP
+        IF to_regclass(format('zoho_fsm.%I', t)) IS NOT NULL AND EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = 'zoho_fsm' AND table_name = t AND column_name = 'synced_snapshot'
+        ) THEN
+            EXECUTE format(
+                'UPDATE zoho_fsm.%I SET synced_snapshot = (
+                     SELECT jsonb_object_agg(lower(s.key), s.value)
+                     FROM jsonb_each(synced_snapshot) AS s(key, value)
+                 )
+                 WHERE jsonb_typeof(synced_snapshot) = %L
+                   AND EXISTS (
+                       SELECT 1 FROM jsonb_object_keys(synced_snapshot) AS k(key)
+                       WHERE k.key <> lower(k.key)
+                   )',
+                t, 'object'
+            );
+        END IF;
+    END LOOP;
+END;
+$$;
+
+-- get_bucket_digests read the Zoho key, which reverse-synced snapshots never had
+CREATE OR REPLACE FUNCTION get_bucket_digests(
+    p_schema TEXT,
+    p_table TEXT,
+    p_bucket_seconds INTEGER,
+    p_before_epoch BIGINT
+)
+RETURNS JSONB AS $$
+DECLARE
+    sql_query TEXT;
+    result JSONB;
+BEGIN
+    sql_query := format(
+        'SELECT jsonb_object_agg(b.bucket::text, jsonb_build_object(%L, b.n, %L, b.digest))
+         FROM (
+             SELECT floor(r.epoch / %s)::bigint AS bucket,
+                    count(*) AS n,
+                    bit_xor((%L || substr(md5(r.zoho_id || %L || r.epoch::text), 1, 16))::bit(64)::bigint) AS digest
+             FROM (
+                 SELECT zoho_id::text AS zoho_id,
+                        COALESCE(floor(extract(epoch FROM (synced_snapshot->>%L)::timestamptz))::bigint, 0) AS epoch
+                 FROM %I.%I
+                 WHERE zoho_id IS NOT NULL AND deleted_at IS NULL
+             ) r
+             WHERE r.epoch < %s
+             GROUP BY 1
+         ) b',
+        'count', 'digest', p_bucket_seconds, 'x', '|', 'modified_time',
+        p_schema, p_table, p_before_epoch
+    );
+
+    EXECUTE sql_query INTO result;
+    RETURN COALESCE(result, '{}'::jsonb);
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in get_bucket_digests: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql STABLE;
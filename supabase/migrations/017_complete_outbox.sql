@@ -0,0 +1,97 @@
+-- Apply reverse-sync results only to rows not edited again since their claim
+-- Migration: 017_complete_outbox.sql
+
+-- Function to record the outcome of pushing claimed outbox rows to Zoho
+-- p_rows holds the status columns to write per row (keyed by id) and
+-- p_versions the {record_id: version} returned by claim_outbox. Rows edited
+-- again since the claim (open outbox entry with a higher version) keep their
+-- pending status so the new edit is pushed too; only a newly assigned zoho_id
+-- is recorded for them, so the next push updates instead of re-creating.
+-- Returns the number of rows flipped to synced.
+CREATE OR REPLACE FUNCTION complete_outbox(
+    p_schema TEXT,
+    p_table TEXT,
+    p_rows JSONB,
+    p_versions JSONB
+)
+RETURNS INTEGER AS $$
+DECLARE
+    sql_query TEXT;
+    update_list TEXT;
+    id_type TEXT;
+    superseded TEXT;
+    locked INTEGER;
+    synced INTEGER := 0;
+BEGIN
+    IF p_rows IS NOT NULL AND jsonb_array_length(p_rows) > 0 THEN
+        SELECT format_type(a.atttypid, a.atttypmod) INTO id_type
+        FROM pg_attribute a
+        WHERE a.attrelid = to_regclass(format('%I.%I', p_schema, p_table))
+          AND a.attname = 'id'
+          AND NOT a.attisdropped;
+
+        -- Lock the rows first: an edit still in flight finishes (bumping its
+        -- outbox version) before we look, and later edits wait for us
+        sql_query := format(
+            'SELECT count(*) FROM (
+                 SELECT 1 FROM %I.%I
+                 WHERE id IN (SELECT (r.row_data->>%L)::%s FROM jsonb_array_elements($1) AS r(row_data))
+                 FOR UPDATE
+             ) l',
+            p_schema, p_table, 'id', id_type
+        );
+        EXECUTE sql_query INTO locked USING p_rows;
+
+        superseded := format(
+            'EXISTS (
+                 SELECT 1 FROM sync_outbox o
+                 JOIN jsonb_each_text($2) AS v(record_id, version) ON v.record_id = o.record_id
+                 WHERE o.schema_name = %L AND o.table_name = %L AND o.processed_at IS NULL
+                   AND o.record_id = dst.id::text AND o.version > v.version::bigint
+             )',
+            p_schema, p_table
+        );
+
+        SELECT string_agg(quote_ident(c.column_name) || ' = src.' || quote_ident(c.column_name), ',')
+        INTO update_list
+        FROM information_schema.columns c
+        WHERE c.table_schema = p_schema
+          AND c.table_name = p_table
+          AND c.column_name NOT IN ('id', 'updated_at')
+          AND EXISTS (
+              SELECT 1 FROM jsonb_array_elements(p_rows) AS r(row_data)
+              WHERE r.row_data ? c.column_name
+          );
+
+        IF update_list IS NOT NULL THEN
+            sql_query := format(
+                'WITH flipped AS (
+                     UPDATE %I.%I AS dst SET %s, updated_at = NOW()
+                     FROM jsonb_populate_recordset(NULL::%I.%I, $1) AS src
+                     WHERE dst.id = src.id AND NOT %s
+                     RETURNING dst.sync_status
+                 )
+                 SELECT count(*) FROM flipped WHERE sync_status = %L',
+                p_schema, p_table, update_list,
+                p_schema, p_table, superseded, 'synced'
+            );
+            EXECUTE sql_query INTO synced USING p_rows, p_versions;
+        END IF;
+
+        sql_query := format(
+            'UPDATE %I.%I AS dst SET zoho_id = src.zoho_id
+             FROM jsonb_populate_recordset(NULL::%I.%I, $1) AS src
+             WHERE dst.id = src.id AND dst.zoho_id IS NULL AND src.zoho_id IS NOT NULL AND %s',
+            p_schema, p_table, p_schema, p_table, superseded
+        );
+        EXECUTE sql_query USING p_rows, p_versions;
+    END IF;
+
+    -- Close the claimed entries; ones bumped since the claim stay open
+    PERFORM ack_outbox(p_schema, p_table, p_versions);
+    RETURN synced;
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE EXCEPTION 'Error in complete_outbox: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
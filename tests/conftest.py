@@ -0,0 +1,7 @@
+import os
+
+# Settings are read at import time; give the required ones dummy values
+for name in ("ZOHO_CLIENT_ID", "ZOHO_CLIENT_SECRET", "ZOHO_REFRESH_TOKEN", "ZOHO_ORG_ID",
+             "SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_ROLE_KEY", "WEBHOOK_SECRET"):
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("ZOHO_TOKEN_CACHE_FILE", "")
@@ -0,0 +1,35 @@
+import time
+
+import pytest
+
+from src.rate_limiter import CreditBudgetExceeded, RateLimiter
+
+
+@pytest.mark.asyncio
+async def test_burst_is_served_immediately_then_throttled():
+    limiter = RateLimiter(rate=50, burst=5, daily_limit=100)
+    started = time.monotonic()
+    for _ in range(5):
+        await limiter.acquire()
+    assert time.monotonic() - started < 0.05
+
+    for _ in range(5):
+        await limiter.acquire()
+    # Five more tokens at 50 per second take about 0.1s to refill
+    assert time.monotonic() - started >= 0.08
+    assert limiter.credits_used == 10
+
+
+@pytest.mark.asyncio
+async def test_background_callers_leave_the_priority_reserve():
+    limiter = RateLimiter(rate=1000, burst=10, daily_limit=5, reserve=2)
+    for _ in range(3):
+        await limiter.acquire()
+    with pytest.raises(CreditBudgetExceeded):
+        await limiter.acquire()
+
+    await limiter.acquire(priority=True)
+    await limiter.acquire(priority=True)
+    with pytest.raises(CreditBudgetExceeded):
+        await limiter.acquire(priority=True)
+    assert limiter.credits_remaining == 0
@@ -0,0 +1,170 @@
+import pytest
+
+import src.sync_manager as sync_manager_module
+from src.config import settings
+from src.rate_limiter import zoho_rate_limiter
+from src.sync_manager import SyncManager
+
+
+class FakeSupabase:
+    """Live and soft-deleted rows by zoho_id"""
+
+    def __init__(self):
+        self.deleted = {}
+
+    async def iter_zoho_ids(self, schema, table, before=None):
+        rows = [{"zoho_id": zoho_id, "deleted": deleted} for zoho_id, deleted in sorted(self.deleted.items())]
+        for start in range(0, len(rows), 7):
+            yield rows[start:start + 7]
+
+    async def set_records_deleted(self, schema, table, zoho_ids, deleted=True):
+        changed = [zoho_id for zoho_id in zoho_ids if self.deleted[zoho_id] != deleted]
+        for zoho_id in changed:
+            self.deleted[zoho_id] = deleted
+        return changed
+
+    def close(self):
+        pass
+
+
+class FakeZoho:
+    """Lists IDs page by page, optionally missing some that still exist"""
+
+    ENTITY_ENDPOINTS = {"work_orders": "fsm/v1/workorders"}
+
+    def __init__(self, ids, unlisted=(), failing=()):
+        self.ids = ids
+        self.unlisted = set(unlisted)
+        self.failing = set(failing)
+        self.fetched = []
+
+    async def iter_pages(self, endpoint, modified_since=None, per_page=None, priority=False,
+                         start_page=1, sort_by=None, fields=None):
+        assert fields == "id"
+        listed = [zoho_id for zoho_id in self.ids if zoho_id not in self.unlisted]
+        for start in range(0, len(listed), 10):
+            yield start // 10 + 1, [{"id": zoho_id} for zoho_id in listed[start:start + 10]]
+
+    async def get_record(self, table, record_id, priority=False):
+        self.fetched.append(record_id)
+        if record_id in self.failing:
+            raise RuntimeError("Zoho API error: 500")
+        return {"id": record_id} if record_id in self.ids else None
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(sync_manager_module, "SupabaseClient", FakeSupabase)
+    monkeypatch.setattr(settings, "reconcile_max_delete_fraction", 0.5)
+    manager = SyncManager()
+    manager.FSM_ENTITIES = ("work_orders",)
+    manager.supabase_client.deleted = {str(1000 + i): False for i in range(40)}
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_rows_gone_from_zoho_are_soft_deleted(manager):
+    ids = [str(1000 + i) for i in range(40) if i not in (3, 17)]
+    manager.zoho_client = FakeZoho(ids)
+    manager.content_hashes["work_orders"] = {"1003": "hash", "1004": "hash"}
+
+    results = await manager.reconcile_deletions()
+
+    assert results["work_orders"] == {"status": "success", "records": 2}
+    assert {zoho_id for zoho_id, deleted in manager.supabase_client.deleted.items() if deleted} == {"1003", "1017"}
+    assert manager.content_hashes["work_orders"] == {"1004": "hash"}
+
+
+@pytest.mark.asyncio
+async def test_unlisted_rows_that_still_exist_are_kept(manager):
+    ids = [str(1000 + i) for i in range(40) if i != 3]
+    # 1010 drifted out of the listing and 1020 can't be fetched; neither is proven gone
+    manager.zoho_client = FakeZoho(ids, unlisted={"1010", "1020"}, failing={"1020"})
+
+    results = await manager.reconcile_deletions()
+
+    assert results["work_orders"]["records"] == 1
+    assert sorted(manager.zoho_client.fetched) == ["1003", "1010", "1020"]
+    assert {zoho_id for zoho_id, deleted in manager.supabase_client.deleted.items() if deleted} == {"1003"}
+
+
+@pytest.mark.asyncio
+async def test_reappearing_rows_are_restored(manager):
+    manager.supabase_client.deleted["1005"] = True
+    manager.zoho_client = FakeZoho([str(1000 + i) for i in range(40)])
+
+    await manager.reconcile_deletions()
+
+    assert not any(manager.supabase_client.deleted.values())
+
+
+@pytest.mark.asyncio
+async def test_mass_deletion_is_refused(manager):
+    manager.zoho_client = FakeZoho([str(1000 + i) for i in range(10)])
+
+    results = await manager.reconcile_deletions()
+
+    assert results["work_orders"]["status"] == "error"
+    assert manager.zoho_client.fetched == []
+    assert not any(manager.supabase_client.deleted.values())
+
+
+@pytest.mark.asyncio
+async def test_confirmations_are_capped_per_run(manager, monkeypatch):
+    monkeypatch.setattr(settings, "reconcile_max_confirmations", 4)
+    manager.zoho_client = FakeZoho([str(1000 + i) for i in range(30)])
+
+    first = await manager.reconcile_deletions()
+    second = await manager.reconcile_deletions()
+    third = await manager.reconcile_deletions()
+
+    assert len(manager.zoho_client.fetched) == 10
+    assert [run["work_orders"]["records"] for run in (first, second, third)] == [4, 4, 2]
+    assert sum(manager.supabase_client.deleted.values()) == 10
+
+
+@pytest.mark.asyncio
+async def test_confirmations_leave_the_credit_reserve(manager, monkeypatch):
+    monkeypatch.setattr(settings, "zoho_priority_credit_reserve", 5)
+    monkeypatch.setattr(zoho_rate_limiter, "_credits_used", zoho_rate_limiter.daily_limit - 7)
+    manager.zoho_client = FakeZoho([str(1000 + i) for i in range(30)])
+
+    results = await manager.reconcile_deletions()
+
+    assert len(manager.zoho_client.fetched) == 2
+    assert results["work_orders"]["records"] == 2
+
+
+@pytest.mark.asyncio
+async def test_periodic_jobs_are_scheduled_from_their_last_run(manager):
+    statuses = {}
+
+    async def get_sync_status(schema, table):
+        return statuses.get(f"{schema}.{table}")
+
+    async def update_sync_status(schema, table, last_sync, status):
+        statuses[f"{schema}.{table}"] = {"last_sync": last_sync, "status": status}
+
+    manager.supabase_client.get_sync_status = get_sync_status
+    manager.supabase_client.update_sync_status = update_sync_status
+    runs = []
+
+    async def reconcile_deletions():
+        runs.append(len(runs))
+        return {"work_orders": {"status": "success", "records": 0}}
+
+    # Never run before, e.g. on a fresh deploy: due straight away
+    await manager._run_periodic_job(reconcile_deletions, 3600)
+    assert runs == [0]
+    assert statuses["jobs.reconcile_deletions"]["status"] == "success"
+
+    # A restart soon after doesn't run it again
+    await manager._run_periodic_job(reconcile_deletions, 3600)
+    assert runs == [0]
+
+    statuses["jobs.reconcile_deletions"]["last_sync"] = "2024-01-01T00:00:00+00:00"
+    await manager._run_periodic_job(reconcile_deletions, 3600)
+    assert runs == [0, 1]
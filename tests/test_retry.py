@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from src.retry import RetryPolicy
+
+
+def test_idempotent_methods_retry_transient_statuses():
+    policy = RetryPolicy()
+    assert policy.retryable_status("GET", 502)
+    assert policy.retryable_status("put", 429)
+    assert not policy.retryable_status("GET", 404)
+
+
+def test_post_only_retries_rejected_requests():
+    policy = RetryPolicy()
+    assert policy.retryable_status("POST", 429)
+    assert policy.retryable_status("POST", 503)
+    assert not policy.retryable_status("POST", 500)
+
+
+def test_network_errors_after_sending_only_retry_idempotent_methods():
+    policy = RetryPolicy()
+    assert policy.retryable_error("POST", request_sent=False)
+    assert not policy.retryable_error("POST", request_sent=True)
+    assert policy.retryable_error("GET", request_sent=True)
+
+
+def test_delay_is_jittered_within_the_backoff_cap():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    for attempt in range(6):
+        delay = policy.delay(attempt)
+        assert 0 <= delay <= min(5.0, 2 ** attempt)
+
+
+def test_retry_after_overrides_backoff():
+    policy = RetryPolicy(base_delay=1.0, max_delay=60.0)
+    assert policy.delay(0, "12") == 12.0
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 <= policy.delay(0, format_datetime(retry_at, usegmt=True)) <= 30
+
+
+def test_unparseable_retry_after_is_ignored():
+    assert RetryPolicy.parse_retry_after("soon") is None
+    assert RetryPolicy.parse_retry_after(None) is None
+    assert RetryPolicy.parse_retry_after("-5") == 0.0
+
+
+def test_retry_after_is_capped_at_max_delay():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    assert policy.delay(0, "3") == 3.0
+    assert policy.delay(0, "7200") == 5.0
+
+
+def test_long_retry_after_is_not_waited_out():
+    policy = RetryPolicy(max_delay=30.0)
+    assert policy.retry_after_allowed(None)
+    assert policy.retry_after_allowed("30")
+    assert not policy.retry_after_allowed("7200")
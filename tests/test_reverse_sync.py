@@ -0,0 +1,137 @@
+import pytest
+
+import src.sync_manager as sync_manager_module
+from src.sync_manager import SyncManager
+
+
+class FakeSupabase:
+    """Records what reverse sync writes back"""
+
+    def __init__(self):
+        self.completed = []
+        self.claims = {}
+
+    async def claim_outbox(self, schema, table, limit=100):
+        queued = self.claims.get(table) or []
+        return queued.pop(0) if queued else {"rows": [], "versions": {}}
+
+    async def complete_outbox(self, schema, table, rows, versions):
+        self.completed.append((table, rows, versions))
+        return sum(1 for row in rows if row["sync_status"] == "synced")
+
+    def close(self):
+        pass
+
+
+class FakeZoho:
+    """Accepts bulk writes, assigning IDs to created records"""
+
+    def __init__(self):
+        self.updates = []
+        self.creates = []
+
+    async def bulk_update(self, table, records):
+        self.updates.extend(records)
+        return [{"status": "success", "details": {"id": record["id"]}} for record in records]
+
+    async def bulk_create(self, table, records):
+        self.creates.extend(records)
+        return [
+            {"status": "success", "details": {"id": f"new-{len(self.creates) - len(records) + index}"}}
+            for index in range(len(records))
+        ]
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(sync_manager_module, "SupabaseClient", FakeSupabase)
+    manager = SyncManager()
+    manager.zoho_client = FakeZoho()
+    manager.content_hashes["work_orders"] = {}
+    return manager
+
+
+def stored_row(manager, record, **columns):
+    """A Zoho record as written on the forward path, then read back from Postgres"""
+    row = manager._prepare_fsm_record("work_orders", record)
+    row.update({"id": 7, "modified_time": "2024-03-01T04:30:00+00:00",
+                "created_time": "2024-02-01T00:00:00+00:00", "amount": 12.5})
+    row.update(columns)
+    return row
+
+
+ZOHO_RECORD = {
+    "id": "5001", "Status": "Open", "Summary": "Replace filter", "Amount": "12.50",
+    "Modified_Time": "2024-03-01T10:00:00+05:30", "Created_Time": "2024-02-01T05:30:00+05:30"
+}
+
+
+@pytest.mark.asyncio
+async def test_unedited_zoho_row_is_not_pushed(manager):
+    row = stored_row(manager, ZOHO_RECORD)
+
+    assert manager._zoho_changes(row) == {}
+    assert await manager._push_to_zoho("work_orders", [row], {"7": 1}) == 1
+    assert manager.zoho_client.updates == []
+
+
+@pytest.mark.asyncio
+async def test_local_edit_sends_only_changed_fields_under_zoho_names(manager):
+    row = stored_row(manager, ZOHO_RECORD, status="Completed")
+
+    assert await manager._push_to_zoho("work_orders", [row], {"7": 1}) == 1
+
+    assert manager.zoho_client.updates == [{"Status": "Completed", "id": "5001"}]
+    _, status_rows, _ = manager.supabase_client.completed[0]
+    assert status_rows[0]["synced_snapshot"]["status"] == "Completed"
+
+
+@pytest.mark.asyncio
+async def test_new_row_is_created_without_system_fields(manager):
+    row = {"id": 9, "zoho_id": None, "status": "Open", "due_date": "2024-05-01",
+           "modified_time": "2024-04-01T00:00:00+00:00", "source": "supabase", "sync_status": "pending"}
+
+    await manager._push_to_zoho("work_orders", [row], {"9": 1})
+
+    assert manager.zoho_client.creates == [{"Status": "Open", "Due_Date": "2024-05-01"}]
+    _, status_rows, _ = manager.supabase_client.completed[0]
+    assert status_rows[0]["zoho_id"] == "new-0"
+
+
+@pytest.mark.asyncio
+async def test_reverse_sync_completes_each_claim_with_its_versions(manager):
+    first = stored_row(manager, ZOHO_RECORD, status="Completed")
+    # The same row edited again while the first push was in flight is claimed
+    # again under its newer outbox version
+    second = stored_row(manager, ZOHO_RECORD, status="Cancelled")
+    manager.supabase_client.claims["work_orders"] = [
+        {"rows": [first], "versions": {"7": 3}},
+        {"rows": [second], "versions": {"7": 4}}
+    ]
+
+    counts = await manager.sync_from_supabase_to_zoho()
+
+    assert counts == {"work_orders": 2, "customers": 0, "technicians": 0}
+    assert [update["Status"] for update in manager.zoho_client.updates] == ["Completed", "Cancelled"]
+    assert [versions for _, _, versions in manager.supabase_client.completed] == [{"7": 3}, {"7": 4}]
+
+
+@pytest.mark.asyncio
+async def test_rejected_rows_are_completed_as_errors(manager):
+    async def bulk_update(table, records):
+        return [{"status": "error", "code": "INVALID_DATA", "message": "bad status"} for _ in records]
+
+    manager.zoho_client.bulk_update = bulk_update
+    row = stored_row(manager, ZOHO_RECORD, status="Bogus")
+
+    assert await manager._push_to_zoho("work_orders", [row], {"7": 1}) == 0
+
+    _, status_rows, versions = manager.supabase_client.completed[0]
+    assert versions == {"7": 1}
+    assert status_rows[0]["sync_status"] == "error"
+    assert status_rows[0]["error_message"] == "bad status"
+    # Every status row carries the same columns for the set-based update
+    assert set(status_rows[0]) == {"id", "zoho_id", "sync_status", "source", "error_message", "synced_snapshot"}
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from src.sync_coordinator import SyncCoordinator
+
+
+class FakeSyncManager:
+    """Records each run and blocks until released, so requests can pile up behind it"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+
+    async def _run(self, kind, tables=None):
+        self.calls.append((kind, set(tables) if tables is not None else None))
+        await self.release.wait()
+        return {"kind": kind}
+
+    async def run_sync_cycle(self):
+        return await self._run("cycle")
+
+    async def sync_fsm_data(self, tables=None):
+        return await self._run("fsm", tables)
+
+    async def backfill_fsm_data(self, tables=None):
+        return await self._run("backfill", tables)
+
+
+async def drain(coordinator, *runs):
+    coordinator.sync_manager.release.set()
+    for run in runs:
+        await asyncio.wait_for(coordinator.wait(run), timeout=1)
+    while coordinator.current is not None:
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_requests_during_a_run_share_one_rerun():
+    coordinator = SyncCoordinator(FakeSyncManager())
+    first = coordinator.request("cycle")
+    queued = [coordinator.request("cycle") for _ in range(5)]
+
+    assert all(run is queued[0] for run in queued)
+    assert queued[0] is not first
+    assert queued[0].requests == 5
+
+    await drain(coordinator, first, queued[0])
+    assert coordinator.sync_manager.calls == [("cycle", None), ("cycle", None)]
+    assert first.status == queued[0].status == "success"
+
+
+@pytest.mark.asyncio
+async def test_queued_fsm_tables_are_merged():
+    coordinator = SyncCoordinator(FakeSyncManager())
+    first = coordinator.request("cycle")
+    a = coordinator.request("fsm", ["customers"])
+    b = coordinator.request("fsm", ["technicians"])
+
+    assert a is b
+    await drain(coordinator, first, a)
+    assert coordinator.sync_manager.calls[1] == ("fsm", {"customers", "technicians"})
+
+
+@pytest.mark.asyncio
+async def test_cycle_absorbs_queued_fsm_sync():
+    coordinator = SyncCoordinator(FakeSyncManager())
+    first = coordinator.request("cycle")
+    fsm = coordinator.request("fsm", ["customers"])
+    cycle = coordinator.request("cycle")
+    again = coordinator.request("fsm", ["work_orders"])
+
+    assert fsm is cycle is again
+    assert cycle.kind == "cycle" and cycle.tables is None
+    await drain(coordinator, first, cycle)
+    assert coordinator.sync_manager.calls == [("cycle", None), ("cycle", None)]
+
+
+@pytest.mark.asyncio
+async def test_backfill_does_not_drop_queued_tables():
+    coordinator = SyncCoordinator(FakeSyncManager())
+    first = coordinator.request("cycle")
+    fsm = coordinator.request("fsm", ["customers", "technicians"])
+    backfill = coordinator.request("backfill", ["customers"])
+
+    assert backfill is not fsm
+    await drain(coordinator, first, fsm, backfill)
+    assert coordinator.sync_manager.calls == [
+        ("cycle", None),
+        ("fsm", {"customers", "technicians"}),
+        ("backfill", {"customers"})
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backfill_widens_covered_fsm_sync():
+    coordinator = SyncCoordinator(FakeSyncManager())
+    first = coordinator.request("cycle")
+    fsm = coordinator.request("fsm", ["customers"])
+    backfill = coordinator.request("backfill", ["customers", "technicians"])
+
+    assert backfill is fsm
+    await drain(coordinator, first, backfill)
+    assert coordinator.sync_manager.calls[1:] == [("backfill", {"customers", "technicians"})]
+
+
+@pytest.mark.asyncio
+async def test_failed_run_still_starts_the_rerun():
+    manager = FakeSyncManager()
+
+    async def failing_cycle():
+        manager.calls.append(("cycle", None))
+        await manager.release.wait()
+        raise RuntimeError("boom")
+
+    manager.run_sync_cycle = failing_cycle
+    coordinator = SyncCoordinator(manager)
+    first = coordinator.request("cycle")
+    rerun = coordinator.request("fsm")
+
+    await drain(coordinator, first, rerun)
+    assert first.status == "error" and first.error == "boom"
+    assert rerun.status == "success"
+
+
+def test_unknown_kind_is_rejected():
+    coordinator = SyncCoordinator(FakeSyncManager())
+    with pytest.raises(ValueError):
+        coordinator.request("everything")
@@ -0,0 +1,284 @@
+import asyncio
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import src.sync_manager as sync_manager_module
+from src.config import settings
+from src.sync_manager import SyncManager
+
+BASE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_records(count, start=BASE, step=timedelta(minutes=1)):
+    return [
+        {"id": str(1000 + i), "Name": f"record {i}", "Modified_Time": (start + step * i).isoformat()}
+        for i in range(count)
+    ]
+
+
+async def paginate(records, page_size, start_page=1):
+    for start in range((start_page - 1) * page_size, len(records), page_size):
+        await asyncio.sleep(0)
+        yield start // page_size + 1, [dict(record) for record in records[start:start + page_size]]
+
+
+class FakeSupabase:
+    """In-memory stand-in for SupabaseClient, keyed by zoho_id"""
+
+    def __init__(self, write_delay=None):
+        self.rows = {}
+        self.status = {}
+        self.checkpoints = {}
+        self.write_delay = write_delay
+
+    async def get_content_hashes(self, schema, table):
+        return {}
+
+    async def upsert_records(self, schema, table, rows, conflict_key="id"):
+        if self.write_delay:
+            await asyncio.sleep(self.write_delay())
+        for row in rows:
+            self.rows[row[conflict_key]] = row
+
+    async def update_sync_status(self, schema, table, last_sync, status):
+        self.status[table] = (last_sync, status)
+
+    async def get_sync_checkpoints(self):
+        return {f"zoho_fsm.{table}": json.loads(json.dumps(checkpoint))
+                for table, checkpoint in self.checkpoints.items()}
+
+    async def save_sync_checkpoint(self, schema, table, status, windows, records_written, started_at=None):
+        previous = self.checkpoints.get(table, {})
+        self.checkpoints[table] = {
+            "status": status,
+            "windows": json.loads(json.dumps(windows)),
+            "records_written": records_written,
+            "started_at": started_at or previous.get("started_at")
+        }
+
+    async def get_bucket_digests(self, schema, table, bucket_seconds, before_epoch):
+        # Same grouping as the SQL function: synced_snapshot's modified_time per live row
+        buckets = {}
+        for row in self.rows.values():
+            if row.get("deleted_at") is not None:
+                continue
+            modified_time = SyncManager._utc_timestamp(row["synced_snapshot"].get("modified_time"))
+            epoch = int(modified_time.timestamp()) if modified_time else 0
+            if epoch >= before_epoch:
+                continue
+            bucket = buckets.setdefault(str(epoch // bucket_seconds), {"count": 0, "digest": 0})
+            bucket["count"] += 1
+            bucket["digest"] ^= SyncManager._bucket_digest(row["zoho_id"], epoch)
+        return buckets
+
+    def close(self):
+        pass
+
+
+class FakeZoho:
+    """Serves a fixed record list like Zoho's paged list endpoint"""
+
+    ENTITY_ENDPOINTS = {"work_orders": "fsm/v1/workorders"}
+
+    def __init__(self, records, fail_after=None):
+        self.records = records
+        self.fail_after = fail_after
+        self.pages_served = 0
+
+    async def get_oldest_record(self, table):
+        return min(self.records, key=lambda record: record["Modified_Time"], default=None)
+
+    async def iter_pages(self, endpoint, modified_since=None, per_page=None, priority=False,
+                         start_page=1, sort_by=None, fields=None):
+        records = sorted(
+            (record for record in self.records
+             if modified_since is None or datetime.fromisoformat(record["Modified_Time"]) > modified_since),
+            key=lambda record: record["Modified_Time"]
+        )
+        async for page in paginate(records, settings.zoho_page_size, start_page):
+            if self.fail_after is not None and self.pages_served >= self.fail_after:
+                await asyncio.sleep(0.05)  # a slow failing request; earlier pages get written
+                raise RuntimeError("Zoho API error: 500")
+            self.pages_served += 1
+            yield page
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(sync_manager_module, "SupabaseClient", FakeSupabase)
+    manager = SyncManager()
+    manager.FSM_ENTITIES = ("work_orders",)
+    return manager
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    monkeypatch.setattr(settings, "batch_size", 3)
+    monkeypatch.setattr(settings, "zoho_page_size", 10)
+    monkeypatch.setattr(settings, "pipeline_queue_size", 2)
+    monkeypatch.setattr(settings, "pipeline_transform_workers", 2)
+    monkeypatch.setattr(settings, "pipeline_writers", 4)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_reports_progress_in_page_order(manager, small_batches):
+    records = make_records(95)
+    rng = random.Random(7)
+    manager.supabase_client = FakeSupabase(write_delay=lambda: rng.uniform(0, 0.005))
+    manager.content_hashes["work_orders"] = {}
+    progress = []
+
+    async def on_progress(next_page, written):
+        # Every page before next_page must already be in the table
+        written_ids = set(manager.supabase_client.rows)
+        expected = {record["id"] for record in records[:(next_page - 1) * settings.zoho_page_size]}
+        assert expected <= written_ids
+        progress.append((next_page, written))
+
+    result = await manager._run_fsm_pipeline("work_orders", paginate(records, 10), on_progress=on_progress)
+
+    assert result["written"] == 95
+    assert result["next_page"] == 11
+    assert result["high_water"] == datetime.fromisoformat(records[-1]["Modified_Time"])
+    pages = [next_page for next_page, _ in progress]
+    assert pages == sorted(pages) and pages[-1] == 11
+    assert [written for _, written in progress] == sorted(written for _, written in progress)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_skips_unchanged_records(manager, small_batches):
+    records = make_records(20)
+    await manager._load_content_hashes("work_orders")
+    first = await manager._run_fsm_pipeline("work_orders", paginate(records, 10))
+
+    records[4]["Name"] = "renamed"
+    second = await manager._run_fsm_pipeline("work_orders", paginate(records, 10))
+
+    assert first["written"] == 20
+    assert second["written"] == 1
+    row = manager.supabase_client.rows["1004"]
+    assert row["name"] == "renamed"
+    assert "id" not in row
+    assert row["synced_snapshot"] == {"name": "renamed", "modified_time": records[4]["Modified_Time"]}
+
+
+@pytest.mark.asyncio
+async def test_pipeline_writer_failure_propagates(manager, small_batches):
+    async def failing_upsert(schema, table, rows, conflict_key="id"):
+        raise RuntimeError("write failed")
+
+    manager.supabase_client.upsert_records = failing_upsert
+    manager.content_hashes["work_orders"] = {}
+    with pytest.raises(RuntimeError, match="write failed"):
+        await manager._run_fsm_pipeline("work_orders", paginate(make_records(40), 10))
+
+
+@pytest.mark.asyncio
+async def test_backfill_splits_busy_windows(manager, small_batches, monkeypatch):
+    monkeypatch.setattr(settings, "backfill_initial_windows", 2)
+    monkeypatch.setattr(settings, "backfill_window_max_pages", 2)
+    # A sparse early history followed by a burst of edits
+    records = make_records(10, step=timedelta(days=3)) + make_records(
+        200, start=BASE + timedelta(days=40), step=timedelta(minutes=5)
+    )
+    for index, record in enumerate(records):
+        record["id"] = str(index)
+    manager.zoho_client = FakeZoho(records)
+
+    results = await manager.backfill_fsm_data()
+
+    assert results["work_orders"]["status"] == "success"
+    assert set(manager.supabase_client.rows) == {record["id"] for record in records}
+    checkpoint = manager.supabase_client.checkpoints["work_orders"]
+    windows = sorted(checkpoint["windows"], key=lambda window: window["start"])
+    assert checkpoint["status"] == "complete"
+    assert len(windows) > 2
+    assert all(window["status"] == "complete" for window in windows)
+    assert all(a["end"] == b["start"] for a, b in zip(windows, windows[1:]))
+
+
+@pytest.mark.asyncio
+async def test_backfill_resumes_after_records_move(manager, small_batches, monkeypatch):
+    monkeypatch.setattr(settings, "backfill_initial_windows", 1)
+    monkeypatch.setattr(settings, "backfill_window_max_pages", 100)
+    records = make_records(100)
+    manager.zoho_client = FakeZoho(records, fail_after=4)
+
+    results = await manager.backfill_fsm_data()
+    assert results["work_orders"]["status"] == "error"
+    checkpoint = manager.supabase_client.checkpoints["work_orders"]
+    assert checkpoint["status"] == "running"
+    assert checkpoint["windows"][0]["cursor"] is not None
+
+    # Records written before the failure are edited, moving them to the end
+    # of the Modified_Time order and shifting every later page
+    written = set(manager.supabase_client.rows)
+    assert written
+    edited_at = datetime.now(timezone.utc) + timedelta(days=1)
+    for record in records:
+        if record["id"] in written:
+            record["Modified_Time"] = edited_at.isoformat()
+    manager.zoho_client.fail_after = None
+    manager.content_hashes.clear()
+
+    results = await manager.backfill_fsm_data()
+
+    assert results["work_orders"]["status"] == "success"
+    assert set(manager.supabase_client.rows) == {record["id"] for record in records}
+    assert manager.supabase_client.checkpoints["work_orders"]["status"] == "complete"
+
+
+@pytest.mark.asyncio
+async def test_verify_repairs_only_mismatched_buckets(manager, small_batches, monkeypatch):
+    monkeypatch.setattr(settings, "verify_bucket_seconds", 86400)
+    monkeypatch.setattr(settings, "backfill_window_max_pages", 2)
+    records = make_records(60, step=timedelta(hours=2))
+    manager.zoho_client = FakeZoho(records)
+    await manager._load_content_hashes("work_orders")
+    await manager._run_fsm_pipeline("work_orders", paginate(records, 10))
+
+    # One row lost and one stale, both on the third day; the hash index still
+    # claims the stale row is current
+    lost, stale = records[26]["id"], records[30]["id"]
+    del manager.supabase_client.rows[lost]
+    manager.supabase_client.rows[stale]["name"] = "stale"
+    writes = []
+    upsert = manager.supabase_client.upsert_records
+
+    async def recording_upsert(schema, table, rows, conflict_key="id"):
+        writes.extend(row["zoho_id"] for row in rows)
+        await upsert(schema, table, rows, conflict_key)
+
+    manager.supabase_client.upsert_records = recording_upsert
+
+    results = await manager.verify_integrity()
+
+    assert results["work_orders"] == {"status": "success", "records": 12}
+    third_day = {record["id"] for record in records[24:36]}
+    assert set(writes) == third_day
+    assert manager.supabase_client.rows[lost]["name"] == records[26]["Name"]
+    assert manager.supabase_client.rows[stale]["name"] == records[30]["Name"]
+    assert await manager.verify_integrity() == {"work_orders": {"status": "success", "records": 0}}
+
+
+@pytest.mark.asyncio
+async def test_verify_in_sync_table_only_lists_ids(manager, small_batches, monkeypatch):
+    monkeypatch.setattr(settings, "verify_bucket_seconds", 86400)
+    ist = timezone(timedelta(hours=5, minutes=30))
+    records = make_records(30, step=timedelta(hours=2))
+    manager.zoho_client = FakeZoho(records)
+    await manager._load_content_hashes("work_orders")
+    await manager._run_fsm_pipeline("work_orders", paginate(records, 10))
+    # Zoho reports times in the org's offset; buckets are compared on the instant
+    for record in records:
+        record["Modified_Time"] = datetime.fromisoformat(record["Modified_Time"]).astimezone(ist).isoformat()
+    manager.zoho_client.pages_served = 0
+
+    assert await manager.verify_integrity() == {"work_orders": {"status": "success", "records": 0}}
+    assert manager.zoho_client.pages_served == 3
@@ -0,0 +1,109 @@
+import pytest
+
+from src.webhook_queue import WebhookQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WebhookQueue(str(tmp_path / "webhooks.db"))
+    yield queue
+    queue.close()
+
+
+def backdate(queue, seconds):
+    """Pretend every event arrived `seconds` earlier"""
+    queue._conn.execute("UPDATE webhook_events SET received_at = received_at - ?", (seconds,))
+
+
+@pytest.mark.asyncio
+async def test_claim_waits_for_key_to_go_quiet(queue):
+    await queue.append("workorder.updated", "work_orders:1", {"id": "1"})
+
+    assert await queue.claim(quiet_seconds=60, limit=10) == []
+    backdate(queue, 61)
+    claimed = await queue.claim(quiet_seconds=60, limit=10)
+    assert [event["dedupe_key"] for event in claimed] == ["work_orders:1"]
+
+
+@pytest.mark.asyncio
+async def test_claim_collapses_repeats_to_latest(queue):
+    first = await queue.append("workorder.updated", "work_orders:1", {"id": "1", "n": 1})
+    other = await queue.append("customer.updated", "customers:7", {"id": "7"})
+    latest = await queue.append("workorder.updated", "work_orders:1", {"id": "1", "n": 2})
+    backdate(queue, 10)
+
+    claimed = {event["dedupe_key"]: event for event in await queue.claim(quiet_seconds=5, limit=10)}
+
+    assert set(claimed) == {"work_orders:1", "customers:7"}
+    assert claimed["work_orders:1"]["id"] == latest
+    assert claimed["work_orders:1"]["payload"] == {"id": "1", "n": 2}
+    assert sorted(claimed["work_orders:1"]["ids"]) == [first, latest]
+    assert claimed["customers:7"]["ids"] == [other]
+
+
+@pytest.mark.asyncio
+async def test_new_event_restarts_the_debounce(queue):
+    await queue.append("workorder.updated", "work_orders:1", {"id": "1"})
+    backdate(queue, 10)
+    await queue.append("workorder.updated", "work_orders:1", {"id": "1"})
+
+    assert await queue.claim(quiet_seconds=5, limit=10) == []
+
+
+@pytest.mark.asyncio
+async def test_completed_events_are_not_claimed_again(queue):
+    await queue.append("workorder.updated", "work_orders:1", {"id": "1"})
+    await queue.append("workorder.updated", "work_orders:2", {"id": "2"})
+    backdate(queue, 10)
+
+    claimed = await queue.claim(quiet_seconds=5, limit=1)
+    assert len(claimed) == 1
+    await queue.complete(claimed[0]["ids"])
+
+    remaining = await queue.claim(quiet_seconds=5, limit=10)
+    assert [event["dedupe_key"] for event in remaining] == ["work_orders:2"]
+    assert await queue.stats() == {"done": 1, "pending": 1}
+
+
+@pytest.mark.asyncio
+async def test_failed_events_retry_then_give_up(queue):
+    await queue.append("workorder.updated", "work_orders:1", {"id": "1"})
+    backdate(queue, 10)
+
+    claimed = await queue.claim(quiet_seconds=5, limit=10)
+    await queue.fail(claimed[0]["ids"], "boom", max_attempts=2)
+    # The retry is pushed back by one debounce window
+    assert await queue.claim(quiet_seconds=5, limit=10) == []
+    backdate(queue, 10)
+    claimed = await queue.claim(quiet_seconds=5, limit=10)
+    assert claimed[0]["attempts"] == 1
+
+    await queue.fail(claimed[0]["ids"], "boom", max_attempts=2)
+    backdate(queue, 10)
+    assert await queue.claim(quiet_seconds=5, limit=10) == []
+    assert await queue.stats() == {"failed": 1}
+
+
+@pytest.mark.asyncio
+async def test_events_survive_reopening(tmp_path):
+    path = str(tmp_path / "webhooks.db")
+    queue = WebhookQueue(path)
+    await queue.append("workorder.updated", "work_orders:1", {"id": "1"})
+    queue.close()
+
+    reopened = WebhookQueue(path)
+    try:
+        assert await reopened.stats() == {"pending": 1}
+    finally:
+        reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_purge_keeps_pending_events(queue):
+    done = await queue.append("workorder.updated", "work_orders:1", {"id": "1"})
+    await queue.append("workorder.updated", "work_orders:2", {"id": "2"})
+    await queue.complete([done])
+    backdate(queue, 3600)
+
+    await queue.purge(older_than_seconds=60)
+    assert await queue.stats() == {"pending": 1}
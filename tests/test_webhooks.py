@@ -0,0 +1,111 @@
+import pytest
+
+import src.sync_manager as sync_manager_module
+from src.sync_coordinator import SyncRun
+from src.sync_manager import SyncManager
+
+
+class FakeSupabase:
+    """Keeps upserted rows by zoho_id"""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def get_content_hashes(self, schema, table):
+        return {}
+
+    async def upsert_records(self, schema, table, rows, conflict_key="id"):
+        for row in rows:
+            self.rows[row[conflict_key]] = row
+
+    def close(self):
+        pass
+
+
+class FakeZoho:
+    """Serves records by ID; unknown IDs are 404s, `failing` ones raise"""
+
+    def __init__(self, records, failing=()):
+        self.records = {record["id"]: record for record in records}
+        self.failing = set(failing)
+        self.fetched = []
+
+    async def get_record(self, table, record_id, priority=False):
+        self.fetched.append((record_id, priority))
+        if record_id in self.failing:
+            raise RuntimeError("Zoho API error: 500")
+        return self.records.get(record_id)
+
+    async def close(self):
+        pass
+
+
+def record(zoho_id):
+    return {"id": zoho_id, "Status": "Open", "Modified_Time": "2024-03-01T10:00:00+05:30"}
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(sync_manager_module, "SupabaseClient", FakeSupabase)
+    manager = SyncManager()
+    manager.zoho_client = FakeZoho([])
+    manager.requested = []
+
+    def request(kind="cycle", tables=None):
+        manager.requested.append((kind, tables))
+        return SyncRun(id=f"run-{len(manager.requested)}", kind=kind, tables=tables)
+
+    monkeypatch.setattr(manager.coordinator, "request", request)
+    return manager
+
+
+def test_webhook_records_accept_full_records_and_bare_ids():
+    assert SyncManager.webhook_records({"data": [record("1"), {"name": "no id"}]}) == [record("1")]
+    assert SyncManager.webhook_records({"data": record("2")}) == [record("2")]
+    assert SyncManager.webhook_records({"ids": ["3", 4]}) == [{"id": "3"}, {"id": "4"}]
+    assert SyncManager.webhook_records({"id": "5"}) == [{"id": "5"}]
+
+
+@pytest.mark.asyncio
+async def test_full_records_are_written_without_calling_zoho(manager):
+    result = await manager.handle_webhook_event("work_order_updated", {"data": [record("1"), record("2")]})
+
+    assert result == {"mode": "records", "table": "work_orders", "records": 2}
+    assert set(manager.supabase_client.rows) == {"1", "2"}
+    assert manager.zoho_client.fetched == []
+    assert manager.requested == []
+
+
+@pytest.mark.asyncio
+async def test_bare_ids_are_fetched_at_priority(manager):
+    manager.zoho_client = FakeZoho([record("1")])
+
+    # "2" was deleted again before we fetched it, so there is nothing to write
+    result = await manager.handle_webhook_event("work_order_created", {"ids": ["1", "2"]})
+
+    assert result == {"mode": "records", "table": "work_orders", "records": 1}
+    assert sorted(manager.zoho_client.fetched) == [("1", True), ("2", True)]
+    assert set(manager.supabase_client.rows) == {"1"}
+    assert manager.requested == []
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_falls_back_to_an_entity_sync(manager):
+    manager.zoho_client = FakeZoho([record("1"), record("2")], failing={"2"})
+
+    result = await manager.handle_webhook_event("work_order_updated", {"ids": ["1", "2"]})
+
+    assert result["records"] == 1
+    assert result["run_id"] == "run-1"
+    assert manager.requested == [("fsm", ["work_orders"])]
+
+
+@pytest.mark.asyncio
+async def test_other_events_queue_an_incremental_sync(manager):
+    deleted = await manager.handle_webhook_event("work_order_deleted", {"ids": ["1"]})
+    unknown = await manager.handle_webhook_event("invoice_updated", {"ids": ["1"]})
+
+    assert deleted == {"mode": "incremental", "table": "work_orders", "run_id": "run-1"}
+    assert unknown == {"mode": "incremental", "table": None, "run_id": "run-2"}
+    assert manager.requested == [("fsm", ["work_orders"]), ("fsm", None)]
+    assert manager.supabase_client.rows == {}
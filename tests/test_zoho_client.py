@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from src.config import settings
+from src.zoho_client import ZohoAPIError, ZohoClient
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.headers = headers or {}
+        self.text = str(self.body)
+
+    def json(self):
+        return self.body
+
+
+class FakeHTTPClient:
+    """Replays canned responses and records the requests made"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    async def request(self, method, url, headers=None, **kwargs):
+        self.requests.append((method, url, kwargs))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = ZohoClient()
+    client.retry_policy.max_delay = 5.0
+
+    async def get_access_token():
+        return "token"
+
+    monkeypatch.setattr(client, "_get_access_token", get_access_token)
+    return client
+
+
+def use_http(monkeypatch, client, *responses):
+    http = FakeHTTPClient(*responses)
+    monkeypatch.setattr(client, "_get_http_client", lambda: http)
+    return http
+
+
+@pytest.mark.asyncio
+async def test_short_retry_after_is_honoured(client, monkeypatch):
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    http = use_http(monkeypatch, client,
+                    FakeResponse(429, headers={"Retry-After": "2"}), FakeResponse(200, {"data": []}))
+
+    assert await client._make_request("GET", "fsm/v1/workorders") == {"data": []}
+    assert sleeps == [2.0]
+    assert len(http.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_lockout_retry_after_fails_instead_of_sleeping(client, monkeypatch):
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    use_http(monkeypatch, client, FakeResponse(429, headers={"Retry-After": "7200"}))
+
+    with pytest.raises(ZohoAPIError) as error:
+        await client._make_request("GET", "fsm/v1/workorders")
+    assert error.value.status_code == 429
+    assert sleeps == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_write_returns_a_result_per_record_across_chunks(client, monkeypatch):
+    monkeypatch.setattr(settings, "zoho_bulk_write_size", 2)
+    chunks = []
+
+    async def make_request(method, endpoint, json=None, **kwargs):
+        chunks.append([record["id"] for record in json["data"]])
+        if len(chunks) == 2:
+            raise ZohoAPIError(500, "Zoho API error: 500")
+        return {"data": [{"status": "success", "details": {"id": record["id"]}} for record in json["data"]]}
+
+    monkeypatch.setattr(client, "_make_request", make_request)
+    records = [{"id": str(n), "Status": "Open"} for n in range(5)]
+
+    results = await client.bulk_update("work_orders", records)
+
+    assert chunks == [["0", "1"], ["2", "3"], ["4"]]
+    assert [result["status"] for result in results] == ["success", "success", "error", "error", "success"]
+    assert results[2]["message"] == "Zoho API error: 500"
@@ -5,9 +5,12 @@ Zoho FSM Client using the correct authentication method
 
 import requests
 import os
+import time
 from typing import Dict, List, Optional
 import logging
 
+from src.retry import RetryPolicy
+
 class ZohoFSMClient:
     def __init__(self, org_id: str, access_token: str = None):
         """
@@ -25,6 +28,7 @@ class ZohoFSMClient:
         self.client_id = os.getenv("ZOHO_CLIENT_ID")
         self.client_secret = os.getenv("ZOHO_CLIENT_SECRET")
         self.refresh_token = os.getenv("ZOHO_REFRESH_TOKEN")
+        self.retry_policy = RetryPolicy(max_retries=int(os.getenv("MAX_RETRIES", 3)))
         
         if not all([self.client_id, self.client_secret, self.refresh_token]):
             raise ValueError("Missing Zoho credentials in environment variables")
@@ -56,44 +60,60 @@ class ZohoFSMClient:
         if not self.access_token:
             self.refresh_access_token()
         
+        method = method.upper()
+        if method not in ('GET', 'POST', 'PUT', 'DELETE'):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
         url = f"{self.base_url}/{endpoint}"
-        headers = {
-            'Authorization': f'Zoho-oauthtoken {self.access_token}',
-            'Content-Type': 'application/json'
-        }
+        token_refreshed = False
+        attempt = 0
         
-        try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=headers, params=params)
-            elif method.upper() == 'POST':
-                response = requests.post(url, headers=headers, json=data)
-            elif method.upper() == 'PUT':
-                response = requests.put(url, headers=headers, json=data)
-            elif method.upper() == 'DELETE':
-                response = requests.delete(url, headers=headers)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+        while True:
+            headers = {
+                'Authorization': f'Zoho-oauthtoken {self.access_token}',
+                'Content-Type': 'application/json'
+            }
             
-            if response.status_code == 401:
+            try:
+                response = requests.request(
+                    method, url, headers=headers, params=params,
+                    json=data if method in ('POST', 'PUT') else None
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                # Only a connect timeout is known not to have reached Zoho;
+                # other failures may have, so they're replayed for idempotent methods only
+                request_sent = not isinstance(e, requests.exceptions.ConnectTimeout)
+                if (attempt < self.retry_policy.max_retries
+                        and self.retry_policy.retryable_error(method, request_sent)):
+                    delay = self.retry_policy.delay(attempt)
+                    logging.warning(f"API request failed ({e}), retrying in {delay:.1f}s")
+                    attempt += 1
+                    time.sleep(delay)
+                    continue
+                logging.error(f"API request failed: {e}")
+                raise
+            
+            if response.status_code == 401 and not token_refreshed:
                 # Token expired, refresh and retry
                 self.refresh_access_token()
-                headers['Authorization'] = f'Zoho-oauthtoken {self.access_token}'
-                
-                if method.upper() == 'GET':
-                    response = requests.get(url, headers=headers, params=params)
-                elif method.upper() == 'POST':
-                    response = requests.post(url, headers=headers, json=data)
-                elif method.upper() == 'PUT':
-                    response = requests.put(url, headers=headers, json=data)
-                elif method.upper() == 'DELETE':
-                    response = requests.delete(url, headers=headers)
+                token_refreshed = True
+                continue
             
-            response.raise_for_status()
-            return response.json()
+            if (attempt < self.retry_policy.max_retries
+                    and self.retry_policy.retryable_status(method, response.status_code)
+                    and self.retry_policy.retry_after_allowed(response.headers.get('Retry-After'))):
+                delay = self.retry_policy.delay(attempt, response.headers.get('Retry-After'))
+                logging.warning(f"API request returned {response.status_code}, retrying in {delay:.1f}s")
+                attempt += 1
+                time.sleep(delay)
+                continue
             
-        except requests.exceptions.RequestException as e:
-            logging.error(f"API request failed: {e}")
-            raise
+            try:
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                logging.error(f"API request failed: {e}")
+                raise
+            return response.json()
     
     def get_workorders(self, limit: int = 100, offset: int = 0) -> List[Dict]:
         """Get work orders from FSM"""